@@ -32,11 +32,18 @@ from app.bot.routers import (
 )
 
 from app.bot.middleware.session import SessionMiddleware
+from app.bot.middleware.db import DbSessionMiddleware
+from app.bot.middleware.auth import AuthContextMiddleware
 from app.bot.middleware.message_cleaner import MessageCleanerMiddleware
+from app.bot.middleware.screens import ScreenTrackerMiddleware
 from app.bot import utils
+from app.db import get_all_servers
 from app.db.init_db import init_db
-from app.bot.tasks.server_health import periodic_server_check
-from app.bot.tasks.user_sync import periodic_user_sync
+from app.bot.tasks.scheduler import scheduler
+from app.bot.tasks.server_health import schedule_server_checks
+from app.bot.tasks.user_sync import schedule_user_sync
+from app.bot.tasks.stats_report import schedule_stats_summary
+from app.wireguard_api import close_clients, configure_peer_cache, configure_server_rate_limits
 
 config = load_config()
 # Custom logger
@@ -56,11 +63,18 @@ async def main():
     global session
     session = aiohttp.ClientSession()
     await init_db()
+    configure_peer_cache(config.PEER_CACHE_DIR, max_disk_bytes=config.PEER_CACHE_DISK_LIMIT_MB * 1024 * 1024)
+    configure_server_rate_limits(await get_all_servers())
     await bot.set_my_commands(utils.get_bot_commands())
 
-    asyncio.create_task(periodic_server_check(session))
-    asyncio.create_task(periodic_user_sync(session))
+    schedule_server_checks(scheduler, session)
+    schedule_user_sync(scheduler, session)
+    schedule_stats_summary(scheduler)
+    scheduler.start()
 
+    dp.update.outer_middleware(DbSessionMiddleware())
+    dp.update.outer_middleware(AuthContextMiddleware())
+    dp.callback_query.outer_middleware(ScreenTrackerMiddleware())
     dp.message.middleware(SessionMiddleware(session))
     dp.callback_query.middleware(SessionMiddleware(session))
     dp.message.middleware(MessageCleanerMiddleware())
@@ -90,12 +104,15 @@ async def main():
         cleanup_router,
     ]:
         dp.include_router(router)
+    utils.index_callback_handlers(dp)
 
     try:
         logger.info("Bot has started successfully and is now polling for updates.")
         await dp.start_polling(bot)
     finally:
+        await scheduler.stop()
         await session.close()
+        await close_clients()
         logger.info("Bot has been shut down gracefully.")
 
 
@@ -1,11 +1,13 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import TelegramObject
-from app.db import get_user_by_tg_id
+from app.db import get_cached_user_by_tg_id
 
 class IsRegistered(BaseFilter):
-    async def __call__(self, event: TelegramObject = None, user_id: int = None) -> bool:
+    async def __call__(self, event: TelegramObject = None, user_id: int = None, db_user=...) -> bool:
         tg_id = user_id or (event.from_user.id if event and event.from_user else None)
         if not tg_id:
             return False
-        user = await get_user_by_tg_id(tg_id)
-        return bool(user and getattr(user, "is_registered", False))
\ No newline at end of file
+        # db_user comes from AuthContextMiddleware; look it up only when called outside it.
+        if db_user is ... or user_id is not None:
+            db_user = await get_cached_user_by_tg_id(tg_id)
+        return bool(db_user and getattr(db_user, "is_registered", False))
@@ -0,0 +1,12 @@
+from aiogram import BaseMiddleware
+from app.db import get_cached_user_by_tg_id
+
+class AuthContextMiddleware(BaseMiddleware):
+    """
+    Loads the DB user behind an update once and exposes it to filters and
+    handlers as `db_user` (None for unknown users and updates without a sender).
+    """
+    async def __call__(self, handler, event, data):
+        tg_user = data.get("event_from_user")
+        data["db_user"] = await get_cached_user_by_tg_id(tg_user.id) if tg_user else None
+        return await handler(event, data)
@@ -0,0 +1,12 @@
+from aiogram import BaseMiddleware
+from app.db import unit_of_work
+
+class DbSessionMiddleware(BaseMiddleware):
+    """
+    Runs each update (filters included) in one DB unit of work.
+    Handlers can take the session as `db`; CRUD calls pick it up on their own.
+    """
+    async def __call__(self, handler, event, data):
+        async with unit_of_work() as db:
+            data["db"] = db
+            return await handler(event, data)
@@ -0,0 +1,28 @@
+from collections import OrderedDict
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+
+# Messages whose callback count is remembered; the oldest are forgotten first.
+MAX_TRACKED_MESSAGES = 10000
+
+_generations: OrderedDict = OrderedDict()
+
+def screen_generation(message) -> int:
+    """
+    Number of callbacks the message's buttons have received so far. Compare it
+    before editing the message later, e.g. after a background refresh.
+    """
+    return _generations.get((message.chat.id, message.message_id), 0)
+
+class ScreenTrackerMiddleware(BaseMiddleware):
+    """
+    Counts callbacks per bot message, so work that edits a message after its
+    handler has returned can tell whether the user moved to another screen on it.
+    """
+    async def __call__(self, handler, event, data):
+        if isinstance(event, CallbackQuery) and event.message:
+            key = (event.message.chat.id, event.message.message_id)
+            _generations[key] = _generations.pop(key, 0) + 1
+            if len(_generations) > MAX_TRACKED_MESSAGES:
+                _generations.popitem(last=False)
+        return await handler(event, data)
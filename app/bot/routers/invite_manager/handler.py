@@ -1,6 +1,6 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
-from app.db import get_active_invites, get_user_by_tg_id, get_all_servers
+from app.db import get_active_invites, get_all_servers
 from .keyboard import invite_manager_menu_keyboard
 import logging
 
@@ -28,9 +28,8 @@ def active_invites_text(invites, servers_dict):
     return "\n".join(lines)
 
 @router.callback_query(F.data == "invite_manager_menu")
-async def show_invite_manager_menu(callback: CallbackQuery):
-    user = await get_user_by_tg_id(callback.from_user.id)
-    if not user or not getattr(user, "is_admin", False):
+async def show_invite_manager_menu(callback: CallbackQuery, db_user):
+    if not db_user or not getattr(db_user, "is_admin", False):
         logger.warning(f"User {callback.from_user.id} tried to access Invite Manager without admin rights")
         await callback.answer("Access denied. Admins only.", show_alert=True)
         return
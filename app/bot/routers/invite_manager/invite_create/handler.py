@@ -5,7 +5,7 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
-from app.db import get_all_servers, create_invite, get_invite_by_code, get_user_by_tg_id
+from app.db import get_all_servers, create_invite, get_invite_by_code
 from .keyboard import select_invite_accept_keyboard
 from .fsm import CreateInviteState
 from app.bot.routers.invite_manager.handler import show_invite_manager_menu
@@ -40,9 +40,8 @@ def get_accept_text(servers, selected_ids, admin_selected):
     return text
 
 @router.callback_query(F.data == "invite_create_menu")
-async def start_create_invite(callback: CallbackQuery, state: FSMContext):
-    user = await get_user_by_tg_id(callback.from_user.id)
-    if not user or not getattr(user, "is_admin", False):
+async def start_create_invite(callback: CallbackQuery, state: FSMContext, db_user):
+    if not db_user or not getattr(db_user, "is_admin", False):
         logger.warning(f"User {callback.from_user.id} tried to access Create Invite without admin rights")
         await callback.answer("Access denied. Admins only.", show_alert=True)
         return
@@ -123,9 +122,8 @@ async def toggle_server(callback: CallbackQuery, state: FSMContext):
     )
 
 @router.callback_query(StateFilter(CreateInviteState.select_servers), F.data == "invite_create_confirm")
-async def confirm_create_invite(callback: CallbackQuery, state: FSMContext):
-    user = await get_user_by_tg_id(callback.from_user.id)
-    if not user or not getattr(user, "is_admin", False):
+async def confirm_create_invite(callback: CallbackQuery, state: FSMContext, db_user):
+    if not db_user or not getattr(db_user, "is_admin", False):
         logger.warning(f"User {callback.from_user.id} tried to confirm invite creation without admin rights")
         await callback.answer("Access denied. Admins only.", show_alert=True)
         return
@@ -148,10 +146,10 @@ async def confirm_create_invite(callback: CallbackQuery, state: FSMContext):
     logger.info(f"Invite code {short_code} created by admin {callback.from_user.id} for servers {selected}, is_admin={admin_selected}")
     await state.clear()
     await callback.answer("✅ Invite code created!")
-    await show_invite_manager_menu(callback)
+    await show_invite_manager_menu(callback, db_user)
 
 @router.callback_query(StateFilter(CreateInviteState.select_servers), F.data == "invite_create_cancel")
-async def cancel_create_invite(callback: CallbackQuery, state: FSMContext):
+async def cancel_create_invite(callback: CallbackQuery, state: FSMContext, db_user):
     await state.clear()
     logger.info(f"Admin {callback.from_user.id} cancelled invite creation")
-    await show_invite_manager_menu(callback)
\ No newline at end of file
+    await show_invite_manager_menu(callback, db_user)
\ No newline at end of file
@@ -1,7 +1,7 @@
 import logging
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
-from app.db import get_active_invites, get_user_by_tg_id, get_all_servers, delete_invite
+from app.db import get_active_invites, get_all_servers, delete_invite
 from .keyboard import delete_invite_keyboard
 from app.bot.routers.invite_manager.handler import show_invite_manager_menu
 
@@ -29,9 +29,8 @@ def numbered_invites_text(invites, servers_dict):
     return "\n".join(lines)
 
 @router.callback_query(F.data == "invite_delete_menu")
-async def show_delete_invite_menu(callback: CallbackQuery):
-    user = await get_user_by_tg_id(callback.from_user.id)
-    if not user or not getattr(user, "is_admin", False):
+async def show_delete_invite_menu(callback: CallbackQuery, db_user):
+    if not db_user or not getattr(db_user, "is_admin", False):
         logger.warning(f"User {callback.from_user.id} tried to access Delete Invite without admin rights")
         await callback.answer("Access denied. Admins only.", show_alert=True)
         return
@@ -48,9 +47,8 @@ async def show_delete_invite_menu(callback: CallbackQuery):
     )
 
 @router.callback_query(F.data.startswith("delete_invite_"))
-async def delete_invite_handler(callback: CallbackQuery):
-    user = await get_user_by_tg_id(callback.from_user.id)
-    if not user or not getattr(user, "is_admin", False):
+async def delete_invite_handler(callback: CallbackQuery, db_user):
+    if not db_user or not getattr(db_user, "is_admin", False):
         logger.warning(f"User {callback.from_user.id} tried to delete invite without admin rights")
         await callback.answer("Access denied. Admins only.", show_alert=True)
         return
@@ -59,4 +57,4 @@ async def delete_invite_handler(callback: CallbackQuery):
     await delete_invite(invite_id)
     logger.info(f"Admin {callback.from_user.id} deleted invite {invite_id}")
     await callback.answer("✅Invite deleted!")
-    await show_delete_invite_menu(callback)
\ No newline at end of file
+    await show_delete_invite_menu(callback, db_user)
\ No newline at end of file
@@ -258,7 +258,7 @@ async def close_file_message(callback: CallbackQuery):
         await callback.answer("You can't close this file.", show_alert=True)
 
 @router.callback_query(IsAdmin(), F.data == "logs_back")
-async def logs_back(callback: CallbackQuery, state: FSMContext):
+async def logs_back(callback: CallbackQuery, state: FSMContext, db_user):
     await cancel_live_task(state)
     from app.bot.routers.main.handler import main_menu_callback
-    await main_menu_callback(callback)
\ No newline at end of file
+    await main_menu_callback(callback, db_user)
\ No newline at end of file
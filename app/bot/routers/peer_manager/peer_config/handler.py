@@ -1,11 +1,12 @@
-import json
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, BufferedInputFile
+from aiogram.types import CallbackQuery
+from app import codec
 from app.wireguard_api.peers import get_peer_by_id
 from app.wireguard_api.provisioning import get_peer_config, get_peer_qr
 from .keyboard import peer_menu_keyboard, peer_config_close_keyboard
 from app.db import get_server_by_id, get_server_api_data_by_server_id_and_tg_id
 from app.bot.filters.is_registered import IsRegistered
+from app.bot.utils import send_cached_file
 
 router = Router()
 
@@ -34,7 +35,7 @@ async def show_peer_menu(callback: CallbackQuery, session):
             "Addresses", "PublicKey", "Endpoint"
         ]
         peer_short = {k: peer.get(k) for k in important_fields if k in peer}
-        peer_json = json.dumps(peer_short, indent=2)
+        peer_json = codec.dumps(peer_short, pretty=True)
         text = (
             f"Peer info: <b>{server.name}</b>\n"
             f"<blockquote><pre>{peer_json}</pre></blockquote>\n"
@@ -70,8 +71,11 @@ async def send_peer_config(callback: CallbackQuery, session):
             api_pass=api_data.api_password,
             peer_id=peer_id
         )
-        await callback.message.answer_document(
-            BufferedInputFile(config.encode("utf-8"), filename="wg-peer.conf"),
+        await send_cached_file(
+            callback.message.answer_document,
+            peer_id,
+            config.encode("utf-8"),
+            filename="wg-peer.conf",
             reply_markup=peer_config_close_keyboard()
         )
         await callback.answer()
@@ -100,8 +104,11 @@ async def send_peer_qr(callback: CallbackQuery, session):
             api_pass=api_data.api_password,
             peer_id=peer_id
         )
-        await callback.message.answer_photo(
-            BufferedInputFile(qr, filename="peer-qr.png"),
+        await send_cached_file(
+            callback.message.answer_photo,
+            peer_id,
+            qr,
+            filename="peer-qr.png",
             reply_markup=peer_config_close_keyboard()
         )
         await callback.answer()
@@ -1,8 +1,8 @@
 import logging
-import json
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
+from app import codec
 from app.db import (
     get_server_by_id,
     get_server_api_data_by_server_id_and_tg_id,
@@ -12,6 +12,7 @@ from app.wireguard_api.provisioning import get_user_peer_info
 from app.wireguard_api.peers import get_peer_by_id, delete_peer_by_id
 from .keyboard import peers_delete_list_keyboard, peer_delete_confirm_keyboard
 from app.bot.filters.is_registered import IsRegistered
+from app.bot.utils import file_ids
 
 router = Router()
 logger = logging.getLogger("peer_delete")
@@ -89,7 +90,7 @@ async def show_peer_delete_confirm(callback: CallbackQuery, session: dict, state
             "Addresses", "PublicKey", "Endpoint"
         ]
         peer_short = {k: peer_data.get(k) for k in important_fields if k in peer_data}
-        peer_json = json.dumps(peer_short, indent=2)
+        peer_json = codec.dumps(peer_short, pretty=True)
         text = (
             f"Peer info: <b>{server.name}</b>\n"
             f"<blockquote><pre>{peer_json}</pre></blockquote>\n"
@@ -126,6 +127,7 @@ async def do_peer_delete(callback: CallbackQuery, session: dict, state: FSMConte
             api_pass=api_data.api_password,
             peer_id=peer_id
         )
+        file_ids.invalidate(peer_id)
         logger.info(f"Peer deleted on server {server_id} by user {callback.from_user.id}")
         await callback.answer("✅ Peer deleted!")
         from app.bot.routers.peer_manager.handler import show_peers_for_server
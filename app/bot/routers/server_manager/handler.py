@@ -1,17 +1,26 @@
+import asyncio
+import contextvars
+import logging
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
-from app.db import get_all_servers, get_user_by_tg_id
+from app.db import get_all_servers
 from .keyboard import server_manager_keyboard
 from app.bot.routers.main.keyboard import main_menu_keyboard
-from app.bot.tasks.server_health import check_all_servers
+from app.bot.middleware.screens import screen_generation
+from app.bot.tasks.server_health import refresh_all_servers
 import zoneinfo
 from aiogram.exceptions import TelegramBadRequest
 
 from app.config import load_config
 config = load_config()
 
+logger = logging.getLogger("server_manager")
+
 router = Router()
 
+# Background refreshes of open Server Manager screens, referenced until done.
+_refresh_tasks: set = set()
+
 def status_emoji(status: str) -> str:
     if status.lower() == "active":
         return "🟢 [Active]"
@@ -46,14 +55,34 @@ async def render_server_manager_message(callback: CallbackQuery):
 
 @router.callback_query(F.data == "server_manager")
 async def open_server_manager(callback: CallbackQuery, session):
-    await check_all_servers(session)
+    """
+    Show the last recorded statuses right away, then check the servers in the
+    background and update the screen in place if the user is still on it.
+    session is the bot's aiohttp session (SessionMiddleware), not a DB session.
+    """
+    await show_server_manager(callback)
+    generation = screen_generation(callback.message)
+    # A fresh context: the refresh must not inherit this update's unit of work or
+    # deadline; check_all_servers opens its own unit of work.
+    task = asyncio.create_task(
+        _refresh_screen(callback, session, generation), context=contextvars.Context()
+    )
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+async def _refresh_screen(callback: CallbackQuery, aiohttp_session, generation: int):
+    try:
+        await refresh_all_servers(aiohttp_session)
+        if screen_generation(callback.message) == generation:
+            await show_server_manager(callback)
+    except Exception as e:
+        logger.warning(f"Server Manager refresh for {callback.from_user.id} failed: {e}")
+
+async def show_server_manager(callback: CallbackQuery):
     text, markup = await render_server_manager_message(callback)
+    # callback.message is the screen as it was when the button was pressed, so it
+    # can't tell whether the render changed anything; Telegram can.
     try:
-        if (
-            callback.message.text == text
-            and callback.message.reply_markup == markup
-        ):
-            return
         await callback.message.edit_text(
             text,
             reply_markup=markup,
@@ -65,14 +94,12 @@ async def open_server_manager(callback: CallbackQuery, session):
 
 @router.callback_query(F.data == "sync_servers")
 async def sync_servers(callback: CallbackQuery, session):
-    await callback.answer("✅ Successfully synchronized!")
-    await check_all_servers(session)
+    await callback.answer("🔄 Checking servers...")
     await open_server_manager(callback, session)
 
 @router.callback_query(F.data == "back_to_main")
-async def back_to_main(callback: CallbackQuery):
-    user = await get_user_by_tg_id(callback.from_user.id)
-    is_admin = bool(user and getattr(user, "is_admin", False))
+async def back_to_main(callback: CallbackQuery, db_user):
+    is_admin = bool(db_user and getattr(db_user, "is_admin", False))
     await callback.message.edit_text(
         "Main Menu",
         reply_markup=main_menu_keyboard(is_admin=is_admin)
@@ -7,8 +7,10 @@ from app.db.crud import (
     get_server_api_data_by_server_id_and_tg_id
 )
 from .keyboard import delete_server_keyboard, confirm_delete_keyboard
-from app.wireguard_api.interfaces import get_all_interfaces
-from app.wireguard_api.users import get_all_users
+from app.wireguard_api.interfaces import iter_all_interfaces
+from app.wireguard_api.users import iter_all_users
+from app.wireguard_api.deadline import deadline, INTERACTIVE_DEADLINE
+from app.wireguard_api.exceptions import DeadlineExceededError
 from app.bot.routers.server_manager.handler import open_server_manager
 from app.bot.filters.is_admin import IsAdmin
 
@@ -49,62 +51,74 @@ async def confirm_delete_server(callback: CallbackQuery, session, state):
     error_block = ""
     api_accessible = False
 
-    if api_data:
-        try:
-            interfaces = await get_all_interfaces(
-                session,
-                server.api_url,
-                api_data.api_login,
-                api_data.api_password
-            )
-            api_accessible = True
-            interfaces_block.append("<b>Interface info:</b>")
-            if interfaces:
-                for idx, iface in enumerate(interfaces, 1):
-                    name = iface.get('DisplayName') or iface.get('Identifier') or '—'
-                    identifier = iface.get('Identifier') or '—'
-                    total_peers = iface.get('TotalPeers', 0)
-                    interfaces_block.append(
-                        f"[{idx}] {name}[{identifier}]\nPeers: {total_peers}"
-                    )
-            else:
-                interfaces_block.append("No interfaces found.")
-        except Exception:
-            error_block = "<blockquote>⚠️ Unable to get server data.</blockquote>"
-            api_accessible = False
-
-    user_ids = await get_users_for_server(server_id)
-    users = []
-    for uid in user_ids:
-        user = await get_user_by_id(uid)
-        if user:
-            users.append(user)
-
-    users_block.append("<b>Users info:</b>")
-    if users:
-        wg_users = []
-        if api_accessible:
+    with deadline(INTERACTIVE_DEADLINE):
+        if api_data:
             try:
-                wg_users = await get_all_users(
-                    session,
-                    server.api_url,
-                    api_data.api_login,
-                    api_data.api_password
-                )
+                interface_lines = []
+                interfaces_partial = False
+                try:
+                    async for iface in iter_all_interfaces(
+                        session,
+                        server.api_url,
+                        api_data.api_login,
+                        api_data.api_password,
+                        fields=("Identifier", "DisplayName", "TotalPeers")
+                    ):
+                        name = iface.get('DisplayName') or iface.get('Identifier') or '—'
+                        identifier = iface.get('Identifier') or '—'
+                        total_peers = iface.get('TotalPeers', 0)
+                        interface_lines.append(
+                            f"[{len(interface_lines) + 1}] {name}[{identifier}]\nPeers: {total_peers}"
+                        )
+                except DeadlineExceededError:
+                    if not interface_lines:
+                        raise
+                    interfaces_partial = True
+                api_accessible = True
+                interfaces_block.append("<b>Interface info:</b>")
+                if interface_lines:
+                    interfaces_block.extend(interface_lines)
+                else:
+                    interfaces_block.append("No interfaces found.")
+                if interfaces_partial:
+                    interfaces_block.append("<i>⏱ List is incomplete: the server did not answer in time.</i>")
             except Exception:
-                wg_users = []
-        for idx, user in enumerate(users, 1):
-            line = f"[{idx}] {user.tg_name or '-'}[{user.tg_id}]"
-            if api_accessible and wg_users:
-                peer_count = 0
-                for u in wg_users:
-                    if str(user.tg_id) == str(u.get('Identifier')):
-                        peer_count = u.get('PeerCount', 0)
-                        break
-                line += f"\nPeers: {peer_count}"
-            users_block.append(line)
-    else:
-        users_block.append("No users have access to this server.")
+                error_block = "<blockquote>⚠️ Unable to get server data.</blockquote>"
+                api_accessible = False
+
+        user_ids = await get_users_for_server(server_id)
+        users = []
+        for uid in user_ids:
+            user = await get_user_by_id(uid)
+            if user:
+                users.append(user)
+
+        users_block.append("<b>Users info:</b>")
+        if users:
+            wg_peer_counts = {}
+            peers_partial = False
+            if api_accessible:
+                try:
+                    async for u in iter_all_users(
+                        session,
+                        server.api_url,
+                        api_data.api_login,
+                        api_data.api_password,
+                        fields=("Identifier", "PeerCount")
+                    ):
+                        wg_peer_counts.setdefault(str(u.get('Identifier')), u.get('PeerCount', 0))
+                except DeadlineExceededError:
+                    peers_partial = True
+                except Exception:
+                    wg_peer_counts = {}
+            for idx, user in enumerate(users, 1):
+                line = f"[{idx}] {user.tg_name or '-'}[{user.tg_id}]"
+                if api_accessible and (wg_peer_counts or peers_partial):
+                    peer_count = wg_peer_counts.get(str(user.tg_id), "?" if peers_partial else 0)
+                    line += f"\nPeers: {peer_count}"
+                users_block.append(line)
+        else:
+            users_block.append("No users have access to this server.")
 
     data_blocks = [
         "\n".join(server_info),
@@ -1,9 +1,9 @@
-import json
 import logging
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
+from app import codec
 from app.bot.filters.is_admin import IsAdmin
 from .fsm import ServerEditState
 from .keyboard import server_edit_custom_keyboard, edit_server_select_keyboard
@@ -30,7 +30,7 @@ def get_edit_config_text(config, error_text=None, raw_text=None):
         error_block = f"<blockquote>⚠️ <b>Error:</b> <i>{error_text}</i></blockquote>\n\n"
     config_block = (
         f"<pre>{raw_text}</pre>" if raw_text is not None
-        else f"<pre>{json.dumps(config, indent=2, ensure_ascii=False)}</pre>"
+        else f"<pre>{codec.dumps(config, pretty=True)}</pre>"
     )
     return (
         f"{error_block}"
@@ -95,7 +95,7 @@ async def server_edit_custom_config(message: Message, state: FSMContext):
     user_text = message.text
 
     try:
-        user_json = json.loads(user_text)
+        user_json = codec.loads(user_text)
         json_parse_error = False
     except Exception:
         user_json = {}
@@ -1,5 +1,4 @@
 import logging
-import json
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
@@ -11,15 +10,16 @@ from .keyboard import (
     server_register_no_users_keyboard,
     server_register_post_add_keyboard,
 )
+from app import codec
 from app.db import (
     create_server, get_server_by_name, get_server_by_api_url,
     create_server_api_data, get_user_by_tg_id, get_all_servers,
-    get_all_users, add_user_server_access
+    get_all_users, add_user_server_access, add_pending_sync
 )
 from app.bot.routers.server_manager.handler import open_server_manager
 from app.bot.routers.server_manager.server_settings.handler import show_server_settings_menu, show_settings_server_menu
 from app.wireguard_api.interfaces import get_all_interfaces
-from app.bot.tasks.user_sync import sync_all_users_on_servers
+from app.bot.tasks.sync_queue import sync_queue
 from aiogram.exceptions import TelegramBadRequest
 
 logger = logging.getLogger("server_register")
@@ -68,7 +68,7 @@ def get_custom_config_text(config, error_text=None, raw_text=None):
         error_block = f"<blockquote>⚠️ <b>Error:</b> <i>{error_text}</i></blockquote>\n\n"
     config_block = (
         f"<pre>{raw_text}</pre>" if raw_text is not None
-        else f"<pre>{json.dumps(config, indent=2, ensure_ascii=False)}</pre>"
+        else f"<pre>{codec.dumps(config, pretty=True)}</pre>"
     )
     return (
         f"{error_block}"
@@ -101,7 +101,7 @@ async def server_register_custom_config(message: Message, state: FSMContext, ses
     user_text = message.text
 
     try:
-        user_json = json.loads(user_text)
+        user_json = codec.loads(user_text)
         json_parse_error = False
     except Exception:
         user_json = {}
@@ -335,11 +335,12 @@ async def server_register_users_apply(callback: CallbackQuery, state: FSMContext
         await add_user_server_access(user_id, server.id)
     logger.info(f"Server '{server.name}' registered and access granted to users: {selected_users | admin_users}")
 
-    await sync_all_users_on_servers(session)
+    await add_pending_sync([server.id])
+    sync_queue.submit_server(session, server.id)
     await state.clear()
     try:
         await callback.message.edit_text(
-            f"✅ Server <b>{server.name}</b> successfully added and synchronized!\n\n"
+            f"✅ Server <b>{server.name}</b> successfully added! Users are being synchronized.\n\n"
             "Would you like to configure this server now?",
             reply_markup=server_register_post_add_keyboard(server.id),
             parse_mode="HTML"
@@ -1,10 +1,10 @@
 import logging
-import json
 import re
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
+from app import codec
 from app.db import get_server_by_id, get_server_api_data_by_server_id_and_tg_id
 from app.bot.routers.server_manager.server_settings.keyboard import server_settings_menu_keyboard
 from app.bot.routers.server_manager.server_settings.adapter_create.keyboard import (
@@ -65,7 +65,7 @@ def get_custom_config_text(readonly, custom_config, error_text=None, raw_text=No
         error_block = f"<blockquote>⚠️ <b>Error:</b> <i>{error_text}</i></blockquote>\n\n"
     config_block = (
         f"<pre>{raw_text}</pre>" if raw_text is not None
-        else f"<pre>{json.dumps(custom_config, indent=2, ensure_ascii=False)}</pre>"
+        else f"<pre>{codec.dumps(custom_config, pretty=True)}</pre>"
     )
     return (
         f"{error_block}"
@@ -125,7 +125,7 @@ async def add_adapter(callback: CallbackQuery, state: FSMContext, session):
         "🔒 <b>Read-only fields:</b>\n"
         f"{readonly_fields_text(readonly)}\n\n"
         "✏️ <b>Editable template:</b>\n"
-        f"<pre>{json.dumps(editable, indent=2, ensure_ascii=False)}</pre>\n\n"
+        f"<pre>{codec.dumps(editable, pretty=True)}</pre>\n\n"
         "ℹ️ <i>Send the updated configuration in the chat or use the buttons below.</i>"
     )
     await callback.message.edit_text(
@@ -166,7 +166,7 @@ async def adapter_create_custom(message: Message, state: FSMContext, session):
     user_text = message.text
 
     try:
-        user_json = json.loads(user_text)
+        user_json = codec.loads(user_text)
         json_parse_error = False
     except Exception:
         user_json = {}
@@ -255,7 +255,7 @@ async def adapter_create_reset(callback: CallbackQuery, state: FSMContext, sessi
         "🔒 <b>Read-only fields:</b>\n"
         f"{readonly_fields_text(readonly)}\n\n"
         "✏️ <b>Editable template:</b>\n"
-        f"<pre>{json.dumps(editable, indent=2, ensure_ascii=False)}</pre>\n\n"
+        f"<pre>{codec.dumps(editable, pretty=True)}</pre>\n\n"
         "ℹ️ <i>Send the updated configuration in the chat or use the buttons below.</i>"
     )
     await callback.message.edit_text(
@@ -1,10 +1,10 @@
 import logging
-import json
 import re
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
+from app import codec
 from app.db import get_server_by_id, get_server_api_data_by_server_id_and_tg_id
 from app.wireguard_api.interfaces import get_interface_by_id, update_interface_by_id, get_all_interfaces
 from app.bot.filters.is_admin import IsAdmin
@@ -62,7 +62,7 @@ def get_custom_config_text(readonly, custom_config, error_text=None, raw_text=No
         error_block = f"<blockquote>⚠️ <b>Error:</b> <i>{error_text}</i></blockquote>\n\n"
     config_block = (
         f"<pre>{raw_text}</pre>" if raw_text is not None
-        else f"<pre>{json.dumps(custom_config, indent=2, ensure_ascii=False)}</pre>"
+        else f"<pre>{codec.dumps(custom_config, pretty=True)}</pre>"
     )
     return (
         f"{error_block}"
@@ -177,7 +177,7 @@ async def adapter_update_custom_message(message: Message, state: FSMContext, ses
     user_text = message.text
 
     try:
-        user_json = json.loads(user_text)
+        user_json = codec.loads(user_text)
         json_parse_error = False
     except Exception:
         user_json = {}
@@ -25,9 +25,10 @@ from app.db import (
     create_server_api_data,
     get_server_api_data_by_server_id_and_user_id,
     get_server_api_data_by_server_id_and_tg_id,
+    add_pending_sync,
 )
 from sqlalchemy import select, update
-from app.db import AsyncSessionLocal, User
+from app.db import session_scope, commit, invalidate_user, User
 from app.bot.routers.main.keyboard import main_menu_keyboard
 from app.bot.utils import generate_password, generate_api_token
 from app.wireguard_api.users import (
@@ -35,7 +36,7 @@ from app.wireguard_api.users import (
     get_user_by_id,
     update_user_by_id,
 )
-from app.bot.tasks.user_sync import sync_all_users_on_servers
+from app.bot.tasks.sync_queue import sync_queue
 
 logger = logging.getLogger("user_register")
 
@@ -55,21 +56,20 @@ def format_error_block(msg: str) -> str:
 
 
 @router.message(CommandStart())
-async def start_handler(message: Message, state: FSMContext):
-    user = await get_user_by_tg_id(message.from_user.id)
-    if user and getattr(user, "is_registered", False):
-        is_admin = bool(user and getattr(user, "is_admin", False))
+async def start_handler(message: Message, state: FSMContext, db_user):
+    if db_user and getattr(db_user, "is_registered", False):
+        is_admin = bool(getattr(db_user, "is_admin", False))
         await message.answer(
             "Main Menu", reply_markup=main_menu_keyboard(is_admin=is_admin)
         )
         return
 
-    async with AsyncSessionLocal() as session:
+    async with session_scope() as session:
         result = await session.execute(select(User))
         users = result.scalars().all()
     is_first = not users
 
-    if user and getattr(user, "is_authenticated", False):
+    if db_user and getattr(db_user, "is_authenticated", False):
         await state.clear()
         msg = await message.answer(
             "<b>Registration:</b>\nYou need to complete registration to access the system",
@@ -288,17 +288,16 @@ async def input_department(message: Message, state: FSMContext, bot):
 @router.callback_query(
     F.data == "confirm_register", UserRegisterState.waiting_confirm_action
 )
-async def confirm_registration(callback: CallbackQuery, state: FSMContext, session):
+async def confirm_registration(callback: CallbackQuery, state: FSMContext, session, db_user):
     data = await state.get_data()
     await state.clear()
     await callback.answer("✅ Registration completed!")
     await callback.message.delete()
-    user = await get_user_by_tg_id(callback.from_user.id)
-    is_admin = bool(user and getattr(user, "is_admin", False))
+    is_admin = bool(db_user and getattr(db_user, "is_admin", False))
     await callback.message.answer(
         "Main Menu", reply_markup=main_menu_keyboard(is_admin=is_admin)
     )
-    async with AsyncSessionLocal() as db_session:
+    async with session_scope(write=True) as db_session:
         await db_session.execute(
             update(User)
             .where(User.tg_id == callback.from_user.id)
@@ -307,14 +306,16 @@ async def confirm_registration(callback: CallbackQuery, state: FSMContext, sessi
                 phone=data["phone"],
                 department=data["department"],
                 is_registered=True,
+                revision=User.revision + 1,
             )
         )
-        await db_session.commit()
+        invalidate_user(callback.from_user.id, db_session)
+        await commit(db_session)
     logger.info(f"User {callback.from_user.id} completed registration")
 
     invite = await get_invite_by_code(data.get("invite_code"))
     if not invite:
-        logger.error(f"Invite not found for user {user.id}")
+        logger.error(f"Invite not found for user {db_user.id}")
         return
 
     admin_tg_id = getattr(invite, "admin_tg_id", None)
@@ -322,6 +323,7 @@ async def confirm_registration(callback: CallbackQuery, state: FSMContext, sessi
         logger.error(f"Invite {invite.code} does not have admin_tg_id set")
         return
 
+    granted_server_ids = []
     for server_id in invite.server_ids:
         server = await get_server_by_id(server_id)
         if not server:
@@ -330,14 +332,16 @@ async def confirm_registration(callback: CallbackQuery, state: FSMContext, sessi
             )
             continue
         try:
-            await add_user_server_access(user.id, server_id)
-            logger.info(f"Granted access: user_id={user.id} to server_id={server_id}")
+            await add_user_server_access(db_user.id, server_id)
+            granted_server_ids.append(server_id)
+            logger.info(f"Granted access: user_id={db_user.id} to server_id={server_id}")
         except Exception as e:
             logger.error(
-                f"Failed to grant access for user_id={user.id} to server_id={server_id}: {e}"
+                f"Failed to grant access for user_id={db_user.id} to server_id={server_id}: {e}"
             )
 
-    await sync_all_users_on_servers(session)
+    await add_pending_sync(granted_server_ids, db_user.id)
+    sync_queue.submit_user(session, db_user.id, granted_server_ids)
 
 
 @router.callback_query(F.data == "edit_register")
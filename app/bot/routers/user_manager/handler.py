@@ -4,6 +4,8 @@ from aiogram.types import CallbackQuery
 from app.db import get_all_users, get_servers_for_user, get_all_servers
 from app.db import get_server_api_data_by_server_id_and_user_id
 from app.wireguard_api.provisioning import get_user_peer_info
+from app.wireguard_api.deadline import deadline, INTERACTIVE_DEADLINE
+from app.wireguard_api.exceptions import DeadlineExceededError
 from .keyboard import users_manager_keyboard
 from app.bot.filters.is_admin import IsAdmin
 
@@ -13,6 +15,7 @@ router = Router()
 async def build_users_info(users, servers, session):
     lines = []
     unresponsive_servers = set()
+    timed_out = False
     for idx, user in enumerate(users, 1):
         servers_ids = await get_servers_for_user(user.id)
         user_servers = [s for s in servers if s.id in servers_ids]
@@ -30,6 +33,9 @@ async def build_users_info(users, servers, session):
                         user_id=api_data.api_login
                     )
                     peer_count = len(user_peer_info.get("Peers", []))
+                except DeadlineExceededError:
+                    peer_count = "…"
+                    timed_out = True
                 except Exception:
                     peer_count = "?"
                     unresponsive_servers.add(server.name)
@@ -44,13 +50,16 @@ async def build_users_info(users, servers, session):
     warn_block = ""
     if unresponsive_servers:
         warn_block = "<blockquote>⚠️ Server " + ", ".join(unresponsive_servers) + " is not responding</blockquote>\n\n"
+    if timed_out:
+        warn_block += "<blockquote>⏱ Some peer counts were not loaded in time (…)</blockquote>\n\n"
     return warn_block + "<blockquote>" + "\n\n".join(lines) + "</blockquote>"
 
 @router.callback_query(IsAdmin(), F.data == "user_manager_menu")
 async def show_user_manager_menu(callback: CallbackQuery, session):
     users = await get_all_users()
     servers = await get_all_servers()
-    users_info = await build_users_info(users, servers, session)
+    with deadline(INTERACTIVE_DEADLINE):
+        users_info = await build_users_info(users, servers, session)
     await callback.message.edit_text(
         "<b>Users Manager:</b>\n" + users_info,
         reply_markup=users_manager_keyboard(),
@@ -58,6 +67,6 @@ async def show_user_manager_menu(callback: CallbackQuery, session):
     )
 
 @router.callback_query(IsAdmin(), F.data == "user_manager_back")
-async def user_manager_back(callback: CallbackQuery):
+async def user_manager_back(callback: CallbackQuery, db_user):
     from app.bot.routers.main.handler import main_menu_callback
-    await main_menu_callback(callback)
\ No newline at end of file
+    await main_menu_callback(callback, db_user)
\ No newline at end of file
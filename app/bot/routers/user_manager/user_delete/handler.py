@@ -4,12 +4,12 @@ from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
 from app.db import get_all_users, get_user_by_id, get_servers_for_user, get_all_servers
-from app.db import AsyncSessionLocal
+from app.db import session_scope, commit, invalidate_user, add_pending_sync
 from app.bot.filters.is_admin import IsAdmin
 from .fsm import DeleteUserState
 from .keyboard import users_select_keyboard, confirm_delete_keyboard
 from app.bot.routers.user_manager.handler import show_user_manager_menu
-from app.bot.tasks.user_sync import sync_all_users_on_servers
+from app.bot.tasks.sync_queue import sync_queue
 
 logger = logging.getLogger("user_delete")
 router = Router()
@@ -95,34 +95,41 @@ async def user_delete_cancel(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(
     IsAdmin(), StateFilter(DeleteUserState.confirm), F.data == "user_delete_confirm"
 )
-async def user_delete_confirm(callback: CallbackQuery, state: FSMContext):
+async def user_delete_confirm(callback: CallbackQuery, state: FSMContext, session):
     data = await state.get_data()
     user_id = data["delete_user_id"]
     from app.db.models import User, UserServerAccess, ServerAPIData, Invite
-    from sqlalchemy import delete, update
-    import aiohttp
+    from sqlalchemy import delete, update, select
 
-    async with AsyncSessionLocal() as session:
-        user = await session.get(User, user_id)
+    async with session_scope(write=True) as db_session:
+        user = await db_session.get(User, user_id)
         tg_id = user.tg_id if user else None
+        # The portal logins go away with server_api_data, so the servers the user
+        # was on are reconciled as a whole.
+        result = await db_session.execute(
+            select(ServerAPIData.server_id).where(ServerAPIData.user_id == user_id)
+        )
+        server_ids = {row[0] for row in result.all()}
 
         if tg_id is not None:
-            await session.execute(
+            await db_session.execute(
                 update(Invite).where(Invite.used_by == tg_id).values(used_by=None)
             )
 
-        await session.execute(
+        await db_session.execute(
             delete(UserServerAccess).where(UserServerAccess.user_id == user_id)
         )
-        await session.execute(
+        await db_session.execute(
             delete(ServerAPIData).where(ServerAPIData.user_id == user_id)
         )
-        await session.execute(delete(User).where(User.id == user_id))
-        await session.commit()
+        await db_session.execute(delete(User).where(User.id == user_id))
+        invalidate_user(tg_id, db_session)
+        await commit(db_session)
         logger.info(f"User {user_id} was deleted by admin {callback.from_user.id}")
 
+    await add_pending_sync(server_ids)
     await state.clear()
-    async with aiohttp.ClientSession() as session:
-        await sync_all_users_on_servers(session)
-        await callback.answer("✅ User deleted successfully!")
-        await show_user_manager_menu(callback, session=session)
+    for server_id in server_ids:
+        sync_queue.submit_server(session, server_id)
+    await callback.answer("✅ User deleted successfully!")
+    await show_user_manager_menu(callback, session=session)
@@ -5,12 +5,12 @@ from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
 from app.db import get_all_users, get_all_servers, get_user_by_id, get_servers_for_user
 from app.db.crud import add_user_server_access, remove_user_server_access
-from app.db import AsyncSessionLocal
+from app.db import session_scope, commit, invalidate_user, add_pending_sync
 from app.bot.filters.is_admin import IsAdmin
 from .fsm import EditAccessState
 from .keyboard import users_select_keyboard, rights_select_keyboard
 from app.bot.routers.user_manager.handler import show_user_manager_menu
-from app.bot.tasks.user_sync import sync_all_users_on_servers
+from app.bot.tasks.sync_queue import sync_queue
     
 logger = logging.getLogger("edit_access")
 router = Router()
@@ -124,10 +124,9 @@ async def edit_access_toggle_server(callback: CallbackQuery, state: FSMContext):
     )
 
 @router.callback_query(IsAdmin(), StateFilter(EditAccessState.select_rights), F.data == "edit_access_confirm")
-async def edit_access_confirm(callback: CallbackQuery, state: FSMContext):
+async def edit_access_confirm(callback: CallbackQuery, state: FSMContext, session):
     from app.db.models import UserServerAccess
     from sqlalchemy import delete
-    import aiohttp
     data = await state.get_data()
     user_id = data["edit_user_id"]
     is_admin = data.get("is_admin", False)
@@ -135,45 +134,58 @@ async def edit_access_confirm(callback: CallbackQuery, state: FSMContext):
     access_all = data.get("access_all", False)
     servers = await get_all_servers()
     user = await get_user_by_id(user_id)
+    old_server_ids = set(await get_servers_for_user(user_id))
+    admin_changed = user.is_admin != is_admin
     changed = False
-    if user.is_admin != is_admin:
-        async with AsyncSessionLocal() as session:
-            db_user = await session.get(type(user), user_id)
+    if admin_changed:
+        async with session_scope(write=True) as db_session:
+            db_user = await db_session.get(type(user), user_id)
             db_user.is_admin = is_admin
-            await session.commit()
+            db_user.revision += 1
+            invalidate_user(db_user.tg_id, db_session)
+            await commit(db_session)
         changed = True
         logger.info(f"User {user_id} admin status changed to {is_admin} by {callback.from_user.id}")
     if is_admin:
-        async with AsyncSessionLocal() as session:
-            await session.execute(
+        async with session_scope(write=True) as db_session:
+            await db_session.execute(
                 delete(UserServerAccess).where(UserServerAccess.user_id == user_id)
             )
             for server in servers:
                 access = UserServerAccess(user_id=user_id, server_id=server.id)
-                session.add(access)
-            await session.commit()
+                db_session.add(access)
+            await commit(db_session)
         logger.info(f"User {user_id} granted access to all servers by {callback.from_user.id}")
         changed = True
     else:
-        async with AsyncSessionLocal() as session:
-            await session.execute(
+        async with session_scope(write=True) as db_session:
+            await db_session.execute(
                 delete(UserServerAccess).where(UserServerAccess.user_id == user_id)
             )
             for server_id in selected_servers:
                 access = UserServerAccess(user_id=user_id, server_id=server_id)
-                session.add(access)
-            await session.commit()
+                db_session.add(access)
+            await commit(db_session)
         logger.info(f"User {user_id} access set to servers {selected_servers} by {callback.from_user.id}")
         changed = True
     await state.clear()
 
-    async with aiohttp.ClientSession() as session:
-        await sync_all_users_on_servers(session)
-        if changed:
-            await callback.answer("✅ User updated!")
-        else:
-            await callback.answer("No changes made.")
-        await show_user_manager_menu(callback, session=session)
+    # Reconcile only the servers whose portal user changes: access toggled, or
+    # every server the user is on if the admin flag (part of the payload) flipped.
+    new_server_ids = {s.id for s in servers} if is_admin else set(selected_servers)
+    if admin_changed:
+        dirty_server_ids = old_server_ids | new_server_ids
+    else:
+        dirty_server_ids = old_server_ids ^ new_server_ids
+    await add_pending_sync(dirty_server_ids, user_id)
+
+    # Runs once this update's changes are committed; the admin doesn't wait for it.
+    sync_queue.submit_user(session, user_id, dirty_server_ids)
+    if changed:
+        await callback.answer("✅ User updated! Syncing with servers…")
+    else:
+        await callback.answer("No changes made.")
+    await show_user_manager_menu(callback, session=session)
 
 @router.callback_query(IsAdmin(), StateFilter(EditAccessState.select_rights), F.data == "edit_access_cancel")
 async def edit_access_cancel(callback: CallbackQuery, state: FSMContext):
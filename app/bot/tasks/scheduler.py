@@ -0,0 +1,183 @@
+import asyncio
+import contextvars
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.wireguard_api.telemetry import Histogram
+
+logger = logging.getLogger("scheduler")
+
+# Histogram buckets (seconds) of job run durations and of start lag.
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# A crashed job loop is restarted after RESTART_DELAY seconds, doubling with
+# every crash in a row up to RESTART_MAX_DELAY.
+RESTART_DELAY = 1.0
+RESTART_MAX_DELAY = 60.0
+
+
+@dataclass
+class JobStats:
+    duration: Histogram = field(default_factory=lambda: Histogram(DURATION_BUCKETS))
+    # How late runs started compared to their slot (event loop stalls).
+    lag: Histogram = field(default_factory=lambda: Histogram(LAG_BUCKETS))
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    # Slots dropped because the previous run was still going or the loop fell behind.
+    skipped: int = 0
+    restarts: int = 0
+    last_error: str = ""
+
+
+@dataclass
+class Job:
+    name: str
+    # Called with no arguments for every run; returns an awaitable.
+    func: Any
+    interval: float
+    jitter: float = 0.0
+    timeout: float | None = None
+    run_at_start: bool = True
+    stats: JobStats = field(default_factory=JobStats)
+    loop_task: asyncio.Task | None = None
+    running: asyncio.Task | None = None
+
+
+class Scheduler:
+    """
+    Runs registered async jobs at a fixed rate: run k of a job is due at
+    start + k * interval, plus up to `jitter` seconds, however long earlier runs
+    took. A slot that comes up while the previous run is still going is skipped,
+    runs are cancelled after `timeout` seconds, and a failing run is logged and
+    counted without stopping the job. Each job runs in a task and context of its
+    own, so jobs can't block or crash each other.
+    """
+
+    def __init__(self):
+        self._jobs: dict = {}
+        self._started = False
+
+    def add_job(self, name: str, func, interval: float, jitter: float = 0.0,
+                timeout: float = None, run_at_start: bool = True) -> Job:
+        if name in self._jobs:
+            raise ValueError(f"Job {name} is already registered")
+        if interval <= 0:
+            raise ValueError(f"Job {name} needs a positive interval")
+        job = Job(name, func, interval, jitter, timeout, run_at_start)
+        self._jobs[name] = job
+        if self._started:
+            self._start_job(job)
+        return job
+
+    def start(self) -> None:
+        self._started = True
+        for job in self._jobs.values():
+            if job.loop_task is None:
+                self._start_job(job)
+
+    async def stop(self) -> None:
+        """
+        Cancel all job loops and the runs in progress, and wait for them to end.
+        """
+        self._started = False
+        tasks = []
+        for job in self._jobs.values():
+            for task in (job.loop_task, job.running):
+                if task is not None and not task.done():
+                    task.cancel()
+                    tasks.append(task)
+            job.loop_task = job.running = None
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> list[dict]:
+        """
+        Plain-dict view of every job's counters, durations and lag.
+        """
+        rows = []
+        for job in self._jobs.values():
+            stats = job.stats
+            rows.append({
+                "job": job.name,
+                "interval": job.interval,
+                "running": job.running is not None and not job.running.done(),
+                "runs": stats.runs,
+                "failures": stats.failures,
+                "timeouts": stats.timeouts,
+                "skipped": stats.skipped,
+                "restarts": stats.restarts,
+                "last_error": stats.last_error,
+                "duration_avg": stats.duration.sum / stats.duration.count if stats.duration.count else 0.0,
+                "duration_p95": stats.duration.quantile(0.95),
+                "duration_max": stats.duration.max,
+                "lag_avg": stats.lag.sum / stats.lag.count if stats.lag.count else 0.0,
+                "lag_max": stats.lag.max,
+            })
+        return rows
+
+    def _start_job(self, job: Job) -> None:
+        # A fresh context: runs must not inherit the caller's unit of work, deadline or priority.
+        job.loop_task = asyncio.create_task(
+            self._supervise(job), name=f"scheduler:{job.name}", context=contextvars.Context()
+        )
+
+    async def _supervise(self, job: Job) -> None:
+        delay = RESTART_DELAY
+        while True:
+            started = time.monotonic()
+            try:
+                await self._run_loop(job)
+            except Exception as e:
+                job.stats.restarts += 1
+                if time.monotonic() - started > RESTART_MAX_DELAY:
+                    delay = RESTART_DELAY
+                logger.error(f"Job {job.name} loop crashed, restarting in {delay:.0f}s: {e!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RESTART_MAX_DELAY)
+
+    async def _run_loop(self, job: Job) -> None:
+        start = time.monotonic()
+        slot = 0 if job.run_at_start else 1
+        while True:
+            due = start + slot * job.interval + random.uniform(0, job.jitter)
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            now = time.monotonic()
+            if job.running is not None and not job.running.done():
+                job.stats.skipped += 1
+                logger.warning(f"Job {job.name} is still running, skipping this run")
+            else:
+                job.stats.lag.observe(now - due)
+                job.running = asyncio.create_task(self._run(job), name=f"scheduler:{job.name}:run")
+            # Slots missed while the event loop was stalled are dropped, not run in a burst.
+            next_slot = max(slot + 1, math.floor((now - start) / job.interval) + 1)
+            job.stats.skipped += next_slot - slot - 1
+            slot = next_slot
+
+    async def _run(self, job: Job) -> None:
+        stats = job.stats
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(job.timeout):
+                await job.func()
+        except TimeoutError:
+            stats.timeouts += 1
+            logger.error(f"Job {job.name} timed out after {job.timeout}s")
+        except Exception as e:
+            stats.failures += 1
+            stats.last_error = repr(e)
+            logger.error(f"Job {job.name} failed: {e!r}")
+        finally:
+            duration = time.monotonic() - started
+            stats.runs += 1
+            stats.duration.observe(duration)
+            logger.debug(f"Job {job.name} finished in {duration:.2f}s")
+
+
+scheduler = Scheduler()
@@ -1,39 +1,127 @@
 import asyncio
 import logging
+import time
 from sqlalchemy import select
 from datetime import datetime
 
 from app.db import (
     get_all_servers,
-    get_admin_api_data_for_server,
-    AsyncSessionLocal,
-    Server,
+    get_admin_api_data_by_server,
+    set_server_statuses,
+    session_scope,
+    unit_of_work,
     User,
 )
-from app.wireguard_api.interfaces import get_all_interfaces
+from app.wireguard_api.client import configure_server_rate_limits, get_client_for
+from app.wireguard_api.exceptions import WireGuardAPIError
+from app.wireguard_api.ratelimit import background_priority
+from app.wireguard_api.singleflight import SingleFlight
 
 from app.config import load_config
 config = load_config()
 
 logger = logging.getLogger("server_health")
 
+# A failed server is rechecked every HEALTH_RETRY_INTERVAL seconds until it
+# recovers. A healthy one is checked every SERVER_HEALTH_INTERVAL seconds, and
+# the interval doubles after every HEALTH_STABLE_CHECKS successes in a row, up
+# to HEALTH_MAX_BACKOFF times.
+HEALTH_RETRY_INTERVAL = 30
+HEALTH_STABLE_CHECKS = 6
+HEALTH_MAX_BACKOFF = 4
+# Upper bound on one scheduler tick of the health check.
+HEALTH_CHECK_TIMEOUT = 120
+
+
+class HealthSchedule:
+    """
+    When each server is due for its next check, adapted to its recent results.
+    """
+
+    def __init__(self):
+        self._due: dict = {}
+        self._successes: dict = {}
+
+    def is_due(self, server_id: int, now: float) -> bool:
+        return self._due.get(server_id, now) <= now
+
+    def record(self, server_id: int, ok: bool, now: float, interval: float) -> float:
+        """
+        Schedule the next check after a result; returns the delay chosen.
+        """
+        if ok:
+            successes = self._successes.get(server_id, 0) + 1
+            delay = interval * min(2 ** ((successes - 1) // HEALTH_STABLE_CHECKS), HEALTH_MAX_BACKOFF)
+        else:
+            successes = 0
+            delay = min(HEALTH_RETRY_INTERVAL, interval)
+        self._successes[server_id] = successes
+        self._due[server_id] = now + delay
+        return delay
+
+    def next_due(self) -> float | None:
+        return min(self._due.values(), default=None)
+
+    def forget(self, keep_ids) -> None:
+        for server_id in set(self._due) - set(keep_ids):
+            self._due.pop(server_id, None)
+            self._successes.pop(server_id, None)
+
+
+health_schedule = HealthSchedule()
+
+_refresh = SingleFlight()
+
 async def get_admin_user():
     """
     Get the first admin user from the database using SQLAlchemy ORM.
     """
-    async with AsyncSessionLocal() as session:
+    async with session_scope() as session:
         result = await session.execute(
             select(User).where(User.is_admin == True).limit(1)
         )
         return result.scalar_one_or_none()
 
-async def check_all_servers(aiohttp_session):
+async def check_all_servers(aiohttp_session, due_only: bool = False, interval=None):
     """
     Check all servers from the DB via API using admin data.
     Updates server status and last_checked in the DB ('active' or 'error').
+    Servers are probed concurrently; all results are written in one statement.
+    due_only skips servers whose next check (see HealthSchedule) isn't due yet.
     aiohttp_session: aiohttp.ClientSession
     """
+    async with unit_of_work():
+        await _check_all_servers(aiohttp_session, due_only, interval or config.SERVER_HEALTH_INTERVAL)
+
+async def refresh_all_servers(aiohttp_session):
+    """
+    Check all servers now, or wait for the check already running: concurrent
+    callers share one refresh.
+    """
+    async def refresh():
+        with background_priority():
+            await check_all_servers(aiohttp_session)
+    await _refresh.do("all", refresh)
+
+async def _probe_server(server, api_data) -> bool:
+    # Portal calls run in a child task: only the result comes back to the caller's unit of work.
+    client = get_client_for(server, api_data)
+    try:
+        await client.probe(require_auth=True)
+    except Exception as e:
+        # 401/403: the portal answered, only these credentials are rejected.
+        client.record_health(isinstance(e, WireGuardAPIError) and e.status in (401, 403))
+        logger.error(f"Server {server.name} [{server.api_url}] is unavailable: {e!r}")
+        return False
+    client.record_health(True)
+    logger.info(f"Server {server.name} [{server.api_url}] is active.")
+    return True
+
+async def _check_all_servers(aiohttp_session, due_only: bool, interval: float):
     servers = await get_all_servers()
+    # Budgets edited in the DB take effect within one tick.
+    configure_server_rate_limits(servers)
+    health_schedule.forget(server.id for server in servers)
     if not servers:
         logger.info("No servers to check.")
         return
@@ -43,37 +131,58 @@ async def check_all_servers(aiohttp_session):
         logger.error("No admin user found in the database!")
         return
 
+    admin_api_data = await get_admin_api_data_by_server()
+    now = time.monotonic()
+    checks = []
     for server in servers:
-        api_data = await get_admin_api_data_for_server(server.id)
+        if due_only and not health_schedule.is_due(server.id, now):
+            continue
+        api_data = admin_api_data.get(server.id)
         if not api_data:
             logger.warning(f"No admin API data for server {server.name} (id={server.id})")
             continue
-        try:
-            await get_all_interfaces(
-                aiohttp_session,
-                server.api_url,
-                api_data.api_login,
-                api_data.api_password
-            )
-            status = "active"
-            logger.info(f"Server {server.name} [{server.api_url}] is active.")
-        except Exception as e:
-            status = "error"
-            logger.error(f"Server {server.name} [{server.api_url}] is unavailable: {e}")
-
-        async with AsyncSessionLocal() as db_session:
-            db_server = await db_session.get(Server, server.id)
-            if db_server:
-                db_server.status = status
-                db_server.last_checked = datetime.utcnow()
-                await db_session.commit()
-        
-async def periodic_server_check(aiohttp_session, interval=None):
+        checks.append((server, api_data))
+    if not checks:
+        return
+
+    semaphore = asyncio.Semaphore(config.SERVER_HEALTH_CONCURRENCY)
+
+    async def check(server, api_data) -> bool:
+        async with semaphore:
+            return await _probe_server(server, api_data)
+
+    results = await asyncio.gather(*(check(server, api_data) for server, api_data in checks))
+
+    checked_at = datetime.utcnow()
+    now = time.monotonic()
+    rows = []
+    for (server, _), ok in zip(checks, results):
+        delay = health_schedule.record(server.id, ok, now, interval)
+        logger.debug(f"Server {server.name}: next check in {delay:.0f}s")
+        rows.append({"id": server.id, "status": "active" if ok else "error", "last_checked": checked_at})
+    await set_server_statuses(rows)
+
+async def check_due_servers(aiohttp_session, interval=None):
+    """
+    One scheduler tick: check the servers whose next check is due (see
+    HealthSchedule), at background priority, behind interactive requests to the
+    same portal.
+    """
+    with background_priority():
+        await check_all_servers(aiohttp_session, due_only=True, interval=interval)
+
+def schedule_server_checks(scheduler, aiohttp_session, interval=None):
     """
-    Periodically checks all servers with the specified interval (in seconds).
+    Register the health check with the scheduler. It ticks often enough for the
+    retry interval of failing servers; healthy ones are only probed when due.
     """
     if interval is None:
         interval = config.SERVER_HEALTH_INTERVAL
-    while True:
-        await check_all_servers(aiohttp_session)
-        await asyncio.sleep(interval)
\ No newline at end of file
+    tick = min(HEALTH_RETRY_INTERVAL, interval)
+    scheduler.add_job(
+        "server_health",
+        lambda: check_due_servers(aiohttp_session, interval),
+        interval=tick,
+        jitter=tick / 10,
+        timeout=HEALTH_CHECK_TIMEOUT,
+    )
@@ -0,0 +1,83 @@
+import logging
+
+from app.wireguard_api.telemetry import get_telemetry
+
+from app.config import load_config
+config = load_config()
+
+logger = logging.getLogger("stats")
+
+# How many portal endpoints (slowest p95 first) a summary lists.
+SUMMARY_TOP_ENDPOINTS = 10
+
+
+def format_api_summary(rows: list[dict], limit: int = SUMMARY_TOP_ENDPOINTS) -> list[str]:
+    """
+    One line per telemetry series (see TelemetryRegistry.snapshot), slowest first.
+    """
+    lines = []
+    for row in rows[:limit]:
+        failed = sum(count for status, count in row["statuses"].items() if status >= 400)
+        lines.append(
+            f"{row['method']} {row['endpoint']} @ {row['server']} [{row['priority']}]: "
+            f"{row['requests']} requests, {row['cache_hits']} cache hits, "
+            f"{failed} error responses, {row['timeouts']} timeouts, {row['errors']} connection errors, "
+            f"p50 {row['latency_p50'] * 1000:.0f}ms, p95 {row['latency_p95'] * 1000:.0f}ms, "
+            f"max {row['latency_max'] * 1000:.0f}ms"
+        )
+    return lines
+
+
+def format_job_summary(rows: list[dict]) -> list[str]:
+    """
+    One line per scheduler job (see Scheduler.snapshot).
+    """
+    lines = []
+    for row in rows:
+        line = (
+            f"{row['job']} (every {row['interval']:.0f}s{', running' if row['running'] else ''}): "
+            f"{row['runs']} runs, {row['failures']} failures, {row['timeouts']} timeouts, "
+            f"{row['skipped']} skipped, {row['restarts']} restarts, "
+            f"duration avg {row['duration_avg']:.2f}s, p95 {row['duration_p95']:.2f}s, "
+            f"max {row['duration_max']:.2f}s, lag max {row['lag_max']:.2f}s"
+        )
+        if row["last_error"]:
+            line += f", last error: {row['last_error']}"
+        lines.append(line)
+    return lines
+
+
+async def log_stats_summary(scheduler):
+    """
+    Log the portal traffic counters and scheduler job stats collected since startup.
+    """
+    rows = get_telemetry().snapshot()
+    # One record per line, so every line shows up under its level in the Logs Manager.
+    if rows:
+        lines = format_api_summary(rows)
+        logger.info(f"Portal traffic, {len(lines)} slowest of {len(rows)} endpoints since startup:")
+        for line in lines:
+            logger.info(line)
+    else:
+        logger.info("Portal traffic: no requests yet")
+    jobs = scheduler.snapshot()
+    logger.info(f"Scheduler, {len(jobs)} jobs since startup:")
+    for row, line in zip(jobs, format_job_summary(jobs)):
+        if row["failures"] or row["timeouts"] or row["restarts"]:
+            logger.warning(line)
+        else:
+            logger.info(line)
+
+
+def schedule_stats_summary(scheduler, interval=None):
+    """
+    Register the periodic stats summary with the scheduler it reports on.
+    """
+    if interval is None:
+        interval = config.STATS_SUMMARY_INTERVAL
+    scheduler.add_job(
+        "stats_summary",
+        lambda: log_stats_summary(scheduler),
+        interval=interval,
+        run_at_start=False,
+    )
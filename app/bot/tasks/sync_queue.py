@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import logging
+import time
+
+from app.db import get_all_servers, after_unit_of_work, in_unit_of_work
+from app.bot.tasks.user_sync import sync_user, sync_server, sync_all_users_on_servers
+from app.wireguard_api.ratelimit import background_priority
+
+logger = logging.getLogger("sync_queue")
+
+# A job starts once no request for its scope arrived for SYNC_DEBOUNCE seconds,
+# but never later than SYNC_MAX_DELAY after the first one.
+SYNC_DEBOUNCE = 0.5
+SYNC_MAX_DELAY = 3.0
+
+ALL = ("all", None)
+
+
+class SyncHandle:
+    """
+    Awaitable result of a queued sync. Several requests merged into one run
+    share its outcome. Awaiting never cancels the run itself.
+    """
+
+    def __init__(self, scope: tuple):
+        self.scope = scope
+        self._future = asyncio.get_running_loop().create_future()
+        # Failures are logged by the queue; nobody has to await the handle.
+        self._future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._enqueued = False
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def add_done_callback(self, callback) -> None:
+        self._future.add_done_callback(lambda _: callback(self))
+
+    def __await__(self):
+        if not self._enqueued and in_unit_of_work():
+            # The request is only enqueued when this unit of work ends.
+            raise RuntimeError("A sync handle can't be awaited inside the unit of work that requested it")
+        return asyncio.shield(self._future).__await__()
+
+
+class _Job:
+    def __init__(self, scope: tuple, aiohttp_session):
+        self.scope = scope
+        self.aiohttp_session = aiohttp_session
+        # For user jobs: servers to reconcile, None for all of the user's servers.
+        self.server_ids: set | None = set()
+        self.handles: list = []
+        self.first_request = self.last_request = time.monotonic()
+        self.runner: asyncio.Task | None = None
+
+    @property
+    def start_at(self) -> float:
+        return min(self.last_request + SYNC_DEBOUNCE, self.first_request + SYNC_MAX_DELAY)
+
+
+class SyncQueue:
+    """
+    Coalescing, debounced queue in front of sync_user / sync_server /
+    sync_all_users_on_servers. Requests for a scope that is already waiting are
+    merged into that one run; a pending full sync absorbs everything else.
+    Runs touching the same server never overlap.
+    """
+
+    def __init__(self):
+        self._pending: dict = {}
+        self._server_locks: dict = {}
+        # Started jobs, which are no longer referenced from _pending.
+        self._running: set = set()
+
+    def submit_user(self, aiohttp_session, user_id: int, server_ids=None) -> SyncHandle:
+        return self._submit(("user", user_id), aiohttp_session, None if server_ids is None else set(server_ids))
+
+    def submit_server(self, aiohttp_session, server_id: int) -> SyncHandle:
+        return self._submit(("server", server_id), aiohttp_session)
+
+    def submit_all(self, aiohttp_session) -> SyncHandle:
+        return self._submit(ALL, aiohttp_session)
+
+    def _submit(self, scope: tuple, aiohttp_session, server_ids=None) -> SyncHandle:
+        handle = SyncHandle(scope)
+        # Runs start in their own task and session, so they must not start before
+        # the caller's writes are committed.
+        after_unit_of_work(lambda: self._enqueue(handle, aiohttp_session, server_ids))
+        return handle
+
+    def _enqueue(self, handle: SyncHandle, aiohttp_session, server_ids) -> None:
+        handle._enqueued = True
+        scope = handle.scope
+        if ALL in self._pending:
+            job = self._pending[ALL]
+        elif scope == ALL:
+            job = self._pending[ALL] = _Job(ALL, aiohttp_session)
+            for other in [s for s in self._pending if s != ALL]:
+                absorbed = self._pending.pop(other)
+                absorbed.runner.cancel()
+                job.handles.extend(absorbed.handles)
+        else:
+            job = self._pending.get(scope)
+            if job is None:
+                job = self._pending[scope] = _Job(scope, aiohttp_session)
+            if scope[0] == "user":
+                job.server_ids = None if server_ids is None or job.server_ids is None else job.server_ids | server_ids
+        job.handles.append(handle)
+        job.last_request = time.monotonic()
+        job.aiohttp_session = aiohttp_session
+        if job.runner is None:
+            # A fresh context: the run must not inherit the requester's unit of
+            # work, deadline or priority.
+            job.runner = asyncio.create_task(self._run(job), context=contextvars.Context())
+
+    async def _run(self, job: _Job) -> None:
+        while (delay := job.start_at - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+        del self._pending[job.scope]
+        self._running.add(job)
+        try:
+            with background_priority():
+                await self._execute(job)
+        except Exception as e:
+            logger.error(f"Sync {job.scope} failed: {e}")
+            for handle in job.handles:
+                if not handle.done():
+                    handle._future.set_exception(e)
+        else:
+            for handle in job.handles:
+                if not handle.done():
+                    handle._future.set_result(None)
+        finally:
+            self._running.discard(job)
+
+    async def _execute(self, job: _Job) -> None:
+        kind, key = job.scope
+        if kind == "server":
+            server_ids = [key]
+        elif kind == "user" and job.server_ids is not None:
+            server_ids = sorted(job.server_ids)
+        else:
+            server_ids = sorted(server.id for server in await get_all_servers())
+
+        # Locks are taken in id order, so runs over overlapping servers can't deadlock.
+        locks = [self._server_locks.setdefault(server_id, asyncio.Lock()) for server_id in server_ids]
+        for lock in locks:
+            await lock.acquire()
+        try:
+            started = time.monotonic()
+            if kind == "user":
+                await sync_user(job.aiohttp_session, key, job.server_ids)
+            elif kind == "server":
+                await sync_server(job.aiohttp_session, key)
+            else:
+                await sync_all_users_on_servers(job.aiohttp_session)
+            logger.info(f"Sync {job.scope} done in {time.monotonic() - started:.1f}s ({len(job.handles)} request(s) merged)")
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+sync_queue = SyncQueue()
@@ -1,22 +1,34 @@
 import asyncio
+import hashlib
+import json
 import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
 from app.db import (
+    unit_of_work,
     get_all_servers,
+    get_server_by_id,
+    get_user_by_id,
+    get_servers_for_user,
+    get_server_api_data_for_user,
+    get_server_api_data_by_server_id_and_tg_id,
+    get_pending_syncs,
+    get_pending_sync_watermark,
+    delete_pending_syncs,
     get_users_for_server,
-    get_user_by_id as get_db_user_by_id,
-    get_server_api_data_by_server_id_and_user_id,
+    get_users_by_ids,
+    get_server_api_data_for_server,
     get_admin_api_data_for_server,
-    get_invite_by_used_by,
+    get_invites_by_used_by,
     create_server_api_data,
-    get_server_api_data_by_server_id_and_tg_id,
-)
-from app.wireguard_api.users import (
-    get_user_by_id as wg_get_user_by_id,
-    get_all_users as wg_get_all_users,
-    create_user as wg_create_user,
-    update_user_by_id,
-    delete_user_by_id,
+    set_server_api_data_synced,
 )
+from app.wireguard_api.users import iter_all_users as wg_iter_all_users
+from app.wireguard_api.client import expected_errors, get_client_for
+from app.wireguard_api.bulk import bulk_delete_users, run_bulk
+from app.wireguard_api.exceptions import WireGuardAPIError
+from app.wireguard_api.ratelimit import background_priority, configure_rate_limit
 from app.bot.utils import generate_password
 
 from app.config import load_config
@@ -24,201 +36,444 @@ config = load_config()
 
 logger = logging.getLogger("user_sync")
 
+# Portal user fields returned by the listing and compared on a full verify.
+VERIFIED_FIELDS = ("Email", "Department", "Phone", "Firstname", "IsAdmin")
+
+# Upper bound on one scheduler tick of the full sweep, debounce included.
+USER_SYNC_JOB_TIMEOUT = 600
+
+# server_id -> time.monotonic() of the last successful full verify.
+_last_verified: dict = {}
+
+@dataclass
+class ServerSyncState:
+    """
+    DB side of one server's reconciliation, loaded up front so the portal work
+    can run in its own task without touching the caller's DB session.
+    """
+    server: Any
+    admin_api_data: Any
+    allowed_user_ids: list
+    user_map: dict
+    api_data_by_user: dict
+    api_data_by_tg: dict
+    invites: dict
+    # server_api_data rows for portal users created during the run; written by the caller.
+    new_api_data: list = field(default_factory=list)
+    # Sync state of existing server_api_data rows (see set_server_api_data_synced); written by the caller.
+    synced: list = field(default_factory=list)
+    # Users with pending_sync markers covered by this pass.
+    pending_user_ids: set = field(default_factory=set)
+    # A marker only a full verify can clear: server-wide, or for a user the DB no
+    # longer links to the server (e.g. deleted along with their credentials).
+    needs_verify: bool = False
+    verified: bool = False
+
 async def sync_all_users_on_servers(aiohttp_session):
+    """
+    Reconcile portal users with DB access rights on every active server.
+    The whole pass runs in one DB unit of work.
+    """
+    async with unit_of_work():
+        await _sync_all_users_on_servers(aiohttp_session)
+
+async def sync_server(aiohttp_session, server_id: int):
+    """
+    Reconcile all portal users of one server (one listing plus the needed changes).
+    """
+    async with unit_of_work():
+        await _sync_all_users_on_servers(aiohttp_session, server_ids={server_id}, verify=True)
+
+async def sync_user(aiohttp_session, user_id: int, server_ids=None):
+    """
+    Reconcile one user on the given servers; by default the servers marked
+    pending for them (see add_pending_sync), else every server they have access
+    to or credentials on. About one portal call per server.
+    """
+    async with unit_of_work():
+        await _sync_user(aiohttp_session, user_id, server_ids)
+
+def _user_payload(db_user, api_login: str, api_token: str, password: str) -> dict:
+    return {
+        "ApiToken": api_token,
+        "Department": db_user.department,
+        "Disabled": False,
+        "DisabledReason": "",
+        "Email": db_user.email,
+        "Firstname": db_user.tg_name,
+        "Identifier": api_login,
+        "IsAdmin": db_user.is_admin,
+        "Lastname": "",
+        "Locked": False,
+        "LockedReason": "",
+        "Notes": "",
+        "Password": password,
+        "Phone": db_user.phone,
+        "Source": "db"
+    }
+
+def _payload_hash(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def _synced_row(api_data, revision=None, payload_hash=None) -> dict:
+    return {"id": api_data.id, "synced_revision": revision, "payload_hash": payload_hash}
+
+def _differs(wg_user: dict, payload: dict) -> bool:
+    # The portal may return "" or omit fields the DB has as NULL.
+    return any((wg_user.get(key) or None) != (payload[key] or None) for key in VERIFIED_FIELDS)
+
+async def _load_server_state(server, watermark: int) -> ServerSyncState | None:
+    """
+    Everything the reconciliation needs from the DB, in a fixed number of queries.
+    """
+    admin_api_data = await get_admin_api_data_for_server(server.id)
+    if not admin_api_data:
+        logger.warning(f"No admin API data for server {server.id}")
+        return None
+    allowed_user_ids = await get_users_for_server(server.id)
+    user_map = await get_users_by_ids(allowed_user_ids)
+    api_data_by_login = await get_server_api_data_for_server(server.id)
+    markers = [m for m in await get_pending_syncs(server_id=server.id) if m.id <= watermark]
+    known_user_ids = set(allowed_user_ids) | {a.user_id for a in api_data_by_login.values()}
+    return ServerSyncState(
+        pending_user_ids={m.user_id for m in markers if m.user_id is not None},
+        needs_verify=any(m.user_id is None or m.user_id not in known_user_ids for m in markers),
+        server=server,
+        admin_api_data=admin_api_data,
+        allowed_user_ids=allowed_user_ids,
+        user_map=user_map,
+        api_data_by_user={a.user_id: a for a in api_data_by_login.values()},
+        api_data_by_tg={a.tg_id: a for a in api_data_by_login.values()},
+        invites=await get_invites_by_used_by(u.tg_id for u in user_map.values()),
+    )
+
+async def _sync_all_users_on_servers(aiohttp_session, server_ids=None, verify=None):
+    """
+    verify=None lists each server's portal users only once USER_SYNC_VERIFY_INTERVAL
+    has passed since its last full verify; in between, only users whose revision
+    or payload changed since the last push are touched.
+    """
+    # Markers up to here are covered by this pass; newer ones must survive it.
+    watermark = await get_pending_sync_watermark()
     servers = await get_all_servers()
+    states = []
     for server in servers:
         if getattr(server, "status", None) != "active":
             continue
+        if server_ids is not None and server.id not in server_ids:
+            continue
+        state = await _load_server_state(server, watermark)
+        if state:
+            states.append(state)
 
-        allowed_user_ids = await get_users_for_server(server.id)
-        user_map = {}
-        for user_id in allowed_user_ids:
-            db_user = await get_db_user_by_id(user_id)
-            if db_user:
-                user_map[user_id] = db_user
+    # Servers are reconciled concurrently; DB reads above and writes below stay
+    # in this task, which owns the unit of work.
+    semaphore = asyncio.Semaphore(config.USER_SYNC_CONCURRENCY)
 
-        admin_api_data = await get_admin_api_data_for_server(server.id)
-        if not admin_api_data:
-            logger.warning(f"No admin API data for server {server.id}")
-            continue
+    async def run(state: ServerSyncState) -> bool:
+        server = state.server
+        full = verify or state.needs_verify
+        if not full and verify is None:
+            last = _last_verified.get(server.id)
+            full = last is None or time.monotonic() - last >= config.USER_SYNC_VERIFY_INTERVAL
+        state.verified = full
+        async with semaphore:
+            try:
+                started = time.monotonic()
+                async with asyncio.timeout(config.USER_SYNC_SERVER_TIMEOUT):
+                    reconciled = await _reconcile_server(aiohttp_session, state, full)
+                if reconciled and full:
+                    _last_verified[server.id] = started
+                if reconciled:
+                    logger.info(f"user_sync: server {server.id} ({getattr(server, 'name', '')}) sync completed successfully")
+                return reconciled
+            except TimeoutError:
+                logger.error(f"user_sync: server {server.id} timed out after {config.USER_SYNC_SERVER_TIMEOUT}s, skipped for this cycle")
+            except Exception as e:
+                logger.error(f"user_sync: server {server.id} sync failed: {e}")
+            return False
 
+    reconciled = await asyncio.gather(*(run(state) for state in states))
+
+    for state in states:
+        for api_data in state.new_api_data:
+            try:
+                await create_server_api_data(api_data)
+                logger.info(f"Created WG user and server_api_data for {api_data['tg_id']} on server {api_data['server_id']}")
+            except Exception as e:
+                logger.error(f"Failed to save server_api_data for {api_data['tg_id']} on server {api_data['server_id']}: {e}")
         try:
-            wg_users = await wg_get_all_users(
-                aiohttp_session,
-                server.api_url,
-                admin_api_data.api_login,
-                admin_api_data.api_password
-            )
+            await set_server_api_data_synced(state.synced)
         except Exception as e:
-            logger.error(f"Failed to get users from WG server {server.id}: {e}")
+            logger.error(f"Failed to save sync state of server {state.server.id}: {e}")
+    for state, ok in zip(states, reconciled):
+        if not ok:
             continue
+        if state.verified:
+            await delete_pending_syncs(watermark, state.server.id)
+        elif state.pending_user_ids:
+            # A fingerprint pass only covers the users it checked.
+            await delete_pending_syncs(watermark, state.server.id, user_ids=state.pending_user_ids)
+    logger.info("user_sync: all servers sync completed successfully")
 
-        wg_api_logins = set(str(u.get("Identifier")) for u in wg_users if u.get("Identifier"))
-
-        for api_login in wg_api_logins:
-            found = False
-            for user_id in allowed_user_ids:
-                api_data = await get_server_api_data_by_server_id_and_user_id(server.id, user_id)
-                if api_data and api_data.api_login == api_login:
-                    found = True
-                    break
-            if not found and api_login != admin_api_data.api_login:
-                try:
-                    await delete_user_by_id(
-                        aiohttp_session,
-                        server.api_url,
-                        admin_api_data.api_login,
-                        admin_api_data.api_password,
-                        api_login
-                    )
-                    logger.info(f"Deleted WG user {api_login} from server {server.id} (not in user_server_access)")
-                except Exception as e:
-                    logger.error(f"Failed to delete WG user {api_login} from server {server.id}: {e}")
-
-        for user_id in allowed_user_ids:
-            db_user = user_map.get(user_id)
-            if not db_user:
-                continue
-
-            api_data = await get_server_api_data_by_server_id_and_user_id(server.id, db_user.id)
-            if not api_data:
-                invite = await get_invite_by_used_by(db_user.id)
-                admin_api_data_for_create = None
-                if invite:
-                    admin_api_data_for_create = await get_server_api_data_by_server_id_and_tg_id(server.id, invite.admin_tg_id)
-                if not admin_api_data_for_create:
-                    admin_api_data_for_create = await get_admin_api_data_for_server(server.id)
-                if not admin_api_data_for_create:
-                    logger.warning(f"No admin API data for server {server.id} (for user {db_user.tg_id})")
-                    continue
-
-                api_login = str(db_user.tg_id)
-                api_password = generate_password()
-                password = getattr(db_user, "password", generate_password())
-                payload = {
-                    "ApiToken": api_password,
-                    "Department": db_user.department,
-                    "Disabled": False,
-                    "DisabledReason": "",
-                    "Email": db_user.email,
-                    "Firstname": db_user.tg_name,
-                    "Identifier": api_login,
-                    "IsAdmin": db_user.is_admin,
-                    "Lastname": "",
-                    "Locked": False,
-                    "LockedReason": "",
-                    "Notes": "",
-                    "Password": password,
-                    "Phone": db_user.phone,
-                    "Source": "db"
-                }
-                try:
-                    await wg_create_user(
-                        session=aiohttp_session,
-                        api_url=server.api_url,
-                        api_user=admin_api_data_for_create.api_login,
-                        api_pass=admin_api_data_for_create.api_password,
-                        user_data=payload
-                    )
-                    await create_server_api_data({
-                        "server_id": server.id,
-                        "user_id": db_user.id,
-                        "tg_id": db_user.tg_id,
-                        "api_login": api_login,
-                        "api_password": api_password,
-                        "password": password
-                    })
-                    logger.info(f"Created WG user and server_api_data for {db_user.tg_id} on server {server.id}")
-                except Exception as e:
-                    logger.error(f"Failed to create WG user {db_user.tg_id} on server {server.id}: {e}")
-                continue
-
-            invite = await get_invite_by_used_by(db_user.id)
-            admin_api_data_for_create = None
-            if invite:
-                admin_api_data_for_create = await get_server_api_data_by_server_id_and_tg_id(server.id, invite.admin_tg_id)
-            if not admin_api_data_for_create:
-                admin_api_data_for_create = await get_admin_api_data_for_server(server.id)
-            if not admin_api_data_for_create:
-                logger.warning(f"No admin API data for server {server.id} (for user {db_user.tg_id})")
-                continue
+async def _reconcile_server(aiohttp_session, state: ServerSyncState, verify: bool) -> bool:
+    """
+    verify=True compares against the portal's user listing, which catches drift made
+    on the portal itself. Otherwise no listing is fetched: users whose revision and
+    payload hash match what was last pushed are skipped, so a cycle without DB
+    changes makes no portal calls.
+    """
+    server = state.server
+    admin_api_data = state.admin_api_data
+    api_data_by_login = {a.api_login: a for a in state.api_data_by_user.values()}
+    allowed = set(state.allowed_user_ids)
 
-            try:
-                wg_user = await wg_get_user_by_id(
+    configure_rate_limit(server.api_url, server.rate_limit_rps, server.max_in_flight)
+    wg_users = None
+    if verify:
+        try:
+            wg_users = {
+                str(u["Identifier"]): u
+                async for u in wg_iter_all_users(
                     aiohttp_session,
                     server.api_url,
-                    admin_api_data_for_create.api_login,
-                    admin_api_data_for_create.api_password,
-                    api_data.api_login
-                )
-                need_update = (
-                    wg_user.get("Email") != db_user.email or
-                    wg_user.get("Department") != db_user.department
+                    admin_api_data.api_login,
+                    admin_api_data.api_password,
+                    fields=("Identifier",) + VERIFIED_FIELDS
                 )
-                if need_update:
-                    payload = {
-                        "ApiToken": api_data.api_password,
-                        "Department": db_user.department,
-                        "Disabled": False,
-                        "DisabledReason": "",
-                        "Email": db_user.email,
-                        "Firstname": db_user.tg_name,
-                        "Identifier": api_data.api_login,
-                        "IsAdmin": db_user.is_admin,
-                        "Lastname": "",
-                        "Locked": False,
-                        "LockedReason": "",
-                        "Notes": "",
-                        "Password": api_data.password,
-                        "Phone": db_user.phone,
-                        "Source": "db"
-                    }
-                    await update_user_by_id(
-                        session=aiohttp_session,
-                        api_url=server.api_url,
-                        api_user=admin_api_data_for_create.api_login,
-                        api_pass=admin_api_data_for_create.api_password,
-                        user_id=api_data.api_login,
-                        user_data=payload
-                    )
-                    logger.info(f"Updated WG user {api_data.api_login} on server {server.id}")
-            except Exception as e:
-                logger.warning(f"User {api_data.api_login} not found on WG server {server.id}: {e}")
-                payload = {
-                    "ApiToken": api_data.api_password,
-                    "Department": db_user.department,
-                    "Disabled": False,
-                    "DisabledReason": "",
-                    "Email": db_user.email,
-                    "Firstname": db_user.tg_name,
-                    "Identifier": api_data.api_login,
-                    "IsAdmin": db_user.is_admin,
-                    "Lastname": "",
-                    "Locked": False,
-                    "LockedReason": "",
-                    "Notes": "",
-                    "Password": api_data.password,
-                    "Phone": db_user.phone,
-                    "Source": "db"
-                }
-                try:
-                    await wg_create_user(
-                        session=aiohttp_session,
-                        api_url=server.api_url,
-                        api_user=admin_api_data_for_create.api_login,
-                        api_pass=admin_api_data_for_create.api_password,
-                        user_data=payload
-                    )
-                    logger.info(f"Created WG user {api_data.api_login} on server {server.id}")
-                except Exception as e2:
-                    logger.error(f"Failed to create WG user {api_data.api_login} on server {server.id}: {e2}")
-
-        logger.info(f"user_sync: server {server.id} ({getattr(server, 'name', '')}) sync completed successfully")
-    logger.info("user_sync: all servers sync completed successfully")
+                if u.get("Identifier")
+            }
+        except Exception as e:
+            logger.error(f"Failed to get users from WG server {server.id}: {e}")
+            return False
+        allowed_logins = {
+            state.api_data_by_user[user_id].api_login
+            for user_id in allowed
+            if user_id in state.api_data_by_user
+        }
+        stale_logins = sorted(set(wg_users) - allowed_logins - {admin_api_data.api_login})
+    else:
+        # Portal users this bot pushed and whose access has since been revoked.
+        stale_logins = sorted(
+            a.api_login for a in state.api_data_by_user.values()
+            if a.user_id not in allowed and a.payload_hash is not None
+            and a.api_login != admin_api_data.api_login
+        )
+
+    admin_client = get_client_for(server, admin_api_data)
+    all_ok = True
+    with expected_errors(404):
+        results = await bulk_delete_users(admin_client, stale_logins, config.USER_SYNC_USER_CONCURRENCY)
+    for result in results:
+        if result.ok or (isinstance(result.error, WireGuardAPIError) and result.error.status == 404):
+            logger.info(f"Deleted WG user {result.item} from server {server.id} (not in user_server_access)")
+            if result.item in api_data_by_login:
+                state.synced.append(_synced_row(api_data_by_login[result.item]))
+        else:
+            all_ok = False
+            logger.error(f"Failed to delete WG user {result.item} from server {server.id}: {result.error}")
+
+    operations = []
+    unchanged = 0
+    for user_id in state.allowed_user_ids:
+        db_user = state.user_map.get(user_id)
+        if not db_user:
+            continue
+
+        # Act as the admin who invited the user, if they have credentials on this server.
+        invite = state.invites.get(db_user.tg_id)
+        creator_api_data = state.api_data_by_tg.get(invite.admin_tg_id) if invite else None
+        client = get_client_for(server, creator_api_data or admin_api_data)
+
+        api_data = state.api_data_by_user.get(db_user.id)
+        if not api_data:
+            operations.append((None, _create_user_operation(client, server, db_user, state.new_api_data)))
+            continue
+
+        payload = _user_payload(db_user, api_data.api_login, api_data.api_password, api_data.password)
+        synced = _synced_row(api_data, db_user.revision, _payload_hash(payload))
+        pushed = api_data.synced_revision == synced["synced_revision"] and api_data.payload_hash == synced["payload_hash"]
+        if not verify:
+            if pushed:
+                unchanged += 1
+            else:
+                operations.append((synced, _upsert_user_operation(client, server, api_data.api_login, payload)))
+            continue
+
+        wg_user = wg_users.get(api_data.api_login)
+        if wg_user is None:
+            logger.warning(f"User {api_data.api_login} not found on WG server {server.id}")
+            operations.append((synced, _recreate_user_operation(client, server, api_data.api_login, payload)))
+        elif _differs(wg_user, payload):
+            operations.append((synced, _update_user_operation(client, server, api_data.api_login, payload)))
+        elif not pushed:
+            # Already matches the portal; remember it so fast cycles skip the user.
+            state.synced.append(synced)
+
+    results = await run_bulk(lambda item: item[1](), operations, config.USER_SYNC_USER_CONCURRENCY)
+    state.synced.extend(result.item[0] for result in results if result.result and result.item[0])
+    if not verify:
+        logger.debug(f"user_sync: server {server.id}: {len(operations)} user(s) pushed, {unchanged} unchanged skipped")
+    return all_ok and all(result.result for result in results)
+
+async def _sync_user(aiohttp_session, user_id: int, server_ids=None):
+    pending = await get_pending_syncs(user_id=user_id)
+    watermark = max((marker.id for marker in pending), default=0)
+    db_user = await get_user_by_id(user_id)
+    access = set(await get_servers_for_user(user_id))
+    api_data_by_server = await get_server_api_data_for_user(user_id)
+    if server_ids is None:
+        server_ids = {marker.server_id for marker in pending} or access | set(api_data_by_server)
+    invites = await get_invites_by_used_by([db_user.tg_id]) if db_user else {}
+    invite = invites.get(db_user.tg_id) if db_user else None
+
+    new_api_data = []
+    operations = []
+    in_sync = []
+    synced = {}
+    for server_id in sorted(server_ids):
+        server = await get_server_by_id(server_id)
+        if not server or getattr(server, "status", None) != "active":
+            continue
+        admin_api_data = await get_admin_api_data_for_server(server_id)
+        if not admin_api_data:
+            logger.warning(f"No admin API data for server {server_id}")
+            continue
+        creator_api_data = None
+        if invite:
+            creator_api_data = await get_server_api_data_by_server_id_and_tg_id(server_id, invite.admin_tg_id)
+        client = get_client_for(server, creator_api_data or admin_api_data)
+
+        api_data = api_data_by_server.get(server_id)
+        if db_user and server_id in access:
+            if api_data is None:
+                operation = _create_user_operation(client, server, db_user, new_api_data)
+            else:
+                payload = _user_payload(db_user, api_data.api_login, api_data.api_password, api_data.password)
+                operation = _upsert_user_operation(client, server, api_data.api_login, payload)
+                synced[server_id] = _synced_row(api_data, db_user.revision, _payload_hash(payload))
+        elif api_data is not None and api_data.api_login != admin_api_data.api_login:
+            operation = _delete_user_operation(get_client_for(server, admin_api_data), server, api_data.api_login)
+            synced[server_id] = _synced_row(api_data)
+        else:
+            in_sync.append(server_id)
+            continue
+        operations.append((server_id, operation))
+
+    results = await run_bulk(lambda item: item[1](), operations, config.USER_SYNC_USER_CONCURRENCY)
+    for api_data in new_api_data:
+        await create_server_api_data(api_data)
+        logger.info(f"Created WG user and server_api_data for {api_data['tg_id']} on server {api_data['server_id']}")
+    in_sync.extend(result.item[0] for result in results if result.result)
+    await set_server_api_data_synced([synced[server_id] for server_id in in_sync if server_id in synced])
+    for server_id in in_sync:
+        await delete_pending_syncs(watermark, server_id, user_id=user_id)
+    logger.info(f"user_sync: user {user_id} synced on servers {sorted(server_ids)}")
+
+def _create_user_operation(client, server, db_user, new_api_data: list):
+    api_login = str(db_user.tg_id)
+    api_password = generate_password()
+    password = getattr(db_user, "password", generate_password())
+
+    payload = _user_payload(db_user, api_login, api_password, password)
+
+    async def operation():
+        try:
+            await client.create_user(payload)
+        except Exception as e:
+            logger.error(f"Failed to create WG user {db_user.tg_id} on server {server.id}: {e}")
+            return False
+        new_api_data.append({
+            "server_id": server.id,
+            "user_id": db_user.id,
+            "tg_id": db_user.tg_id,
+            "api_login": api_login,
+            "api_password": api_password,
+            "password": password,
+            "synced_revision": db_user.revision,
+            "payload_hash": _payload_hash(payload),
+        })
+        return True
+    return operation
+
+def _recreate_user_operation(client, server, api_login: str, payload: dict):
+    async def operation():
+        try:
+            await client.create_user(payload)
+            logger.info(f"Created WG user {api_login} on server {server.id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to create WG user {api_login} on server {server.id}: {e}")
+            return False
+    return operation
+
+def _update_user_operation(client, server, api_login: str, payload: dict):
+    async def operation():
+        try:
+            await client.update_user_by_id(api_login, payload)
+            logger.info(f"Updated WG user {api_login} on server {server.id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to update WG user {api_login} on server {server.id}: {e}")
+            return False
+    return operation
+
+def _upsert_user_operation(client, server, api_login: str, payload: dict):
+    """
+    Update the portal user in one call, creating it if the portal no longer has it.
+    """
+    async def operation():
+        try:
+            with expected_errors(404):
+                await client.update_user_by_id(api_login, payload)
+            logger.info(f"Updated WG user {api_login} on server {server.id}")
+            return True
+        except WireGuardAPIError as e:
+            if e.status != 404:
+                logger.error(f"Failed to update WG user {api_login} on server {server.id}: {e}")
+                return False
+        except Exception as e:
+            logger.error(f"Failed to update WG user {api_login} on server {server.id}: {e}")
+            return False
+        return await _recreate_user_operation(client, server, api_login, payload)()
+    return operation
+
+def _delete_user_operation(client, server, api_login: str):
+    async def operation():
+        try:
+            with expected_errors(404):
+                await client.delete_user_by_id(api_login)
+            logger.info(f"Deleted WG user {api_login} from server {server.id} (not in user_server_access)")
+            return True
+        except WireGuardAPIError as e:
+            if e.status == 404:
+                return True
+            logger.error(f"Failed to delete WG user {api_login} from server {server.id}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to delete WG user {api_login} from server {server.id}: {e}")
+        return False
+    return operation
+
+async def queue_full_sync(aiohttp_session):
+    """
+    One scheduler tick: a full sweep through the sync queue, so it merges with
+    (and never overlaps) syncs requested by admin actions.
+    """
+    from app.bot.tasks.sync_queue import sync_queue
+    with background_priority():
+        await sync_queue.submit_all(aiohttp_session)
 
-async def periodic_user_sync(aiohttp_session, interval=None):
+def schedule_user_sync(scheduler, aiohttp_session, interval=None):
+    """
+    Register the periodic full sweep with the scheduler. A timed-out tick only
+    stops waiting: the sweep itself keeps running in the sync queue.
+    """
     if interval is None:
         interval = config.USER_SYNC_INTERVAL
-    while True:
-        await sync_all_users_on_servers(aiohttp_session)
-        await asyncio.sleep(interval)
\ No newline at end of file
+    scheduler.add_job(
+        "user_sync",
+        lambda: queue_full_sync(aiohttp_session),
+        interval=interval,
+        jitter=interval / 10,
+        timeout=USER_SYNC_JOB_TIMEOUT,
+    )
@@ -1,4 +1,6 @@
 from .commands import get_bot_commands
 from .security import generate_password, generate_api_token
+from .file_ids import file_ids, send_cached_file
+from .callback_index import index_callback_handlers
 
-__all__ = ["get_bot_commands", "generate_password", "generate_api_token"]
\ No newline at end of file
+__all__ = ["get_bot_commands", "generate_password", "generate_api_token", "file_ids", "send_cached_file", "index_callback_handlers"]
\ No newline at end of file
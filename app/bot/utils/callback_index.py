@@ -0,0 +1,225 @@
+import operator
+import re
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import UNHANDLED, SkipHandler
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.types import CallbackQuery, User
+from magic_filter.operations import CallOperation, ComparatorOperation, FunctionOperation, GetAttributeOperation
+
+_REGEX_META = set("\\.^$*+?{}[]|()")
+
+
+def _regex_prefix(pattern: re.Pattern) -> str | None:
+    """
+    Literal text every match of pattern starts with, or None if that can't be told
+    simply (flags, alternation).
+    """
+    if pattern.flags & ~re.UNICODE or "|" in pattern.pattern:
+        return None
+    source = pattern.pattern.removeprefix("^")
+    prefix = []
+    for char in source:
+        if char in _REGEX_META:
+            # An optional last character is not part of every match.
+            if char in "?*{" and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return "".join(prefix)
+
+
+def data_keys(handler: HandlerObject) -> tuple[str, tuple] | None:
+    """
+    What the handler requires of callback.data, from its first F.data filter:
+    ("exact", values) or ("prefix", prefixes). None means it can't be indexed.
+    """
+    for filter_ in handler.filters or ():
+        magic = filter_.magic
+        if magic is None:
+            continue
+        ops = magic._operations
+        if len(ops) < 2 or not isinstance(ops[0], GetAttributeOperation) or ops[0].name != "data":
+            continue
+        if len(ops) == 2 and isinstance(ops[1], ComparatorOperation):
+            if ops[1].comparator is operator.eq and isinstance(ops[1].right, str):
+                return "exact", (ops[1].right,)
+        elif len(ops) == 2 and isinstance(ops[1], FunctionOperation):
+            pattern = getattr(ops[1].function, "__self__", None)
+            if isinstance(pattern, re.Pattern) and ops[1].function.__name__ == "match":
+                prefix = _regex_prefix(pattern)
+                if prefix is not None:
+                    return "prefix", (prefix,)
+        elif (
+            len(ops) == 3
+            and isinstance(ops[1], GetAttributeOperation) and ops[1].name == "startswith"
+            and isinstance(ops[2], CallOperation) and len(ops[2].args) == 1 and not ops[2].kwargs
+        ):
+            prefixes = ops[2].args[0]
+            if isinstance(prefixes, str):
+                prefixes = (prefixes,)
+            if isinstance(prefixes, tuple) and all(isinstance(p, str) for p in prefixes):
+                return "prefix", prefixes
+    return None
+
+
+class _Node:
+    __slots__ = ("children", "exact", "prefix")
+
+    def __init__(self):
+        self.children: dict = {}
+        self.exact: list = []
+        self.prefix: list = []
+
+
+class CallbackTrie:
+    """
+    Handlers of one callback_query observer, indexed by the callback data they
+    accept. candidates(data) returns, in registration order, only the handlers
+    that can match data: those whose exact value or prefix fits, plus the ones
+    whose data filter couldn't be indexed.
+    """
+
+    def __init__(self, handlers: list):
+        self.handlers = list(handlers)
+        self.root = _Node()
+        self.unindexed: list = []
+        for position, handler in enumerate(self.handlers):
+            keys = data_keys(handler)
+            if keys is None:
+                self.unindexed.append(position)
+                continue
+            kind, values = keys
+            for value in set(values):
+                node = self.root
+                for char in value:
+                    node = node.children.setdefault(char, _Node())
+                getattr(node, kind).append(position)
+
+    def candidates(self, data: str | None) -> list:
+        positions = list(self.unindexed)
+        if data is not None:
+            node = self.root
+            positions.extend(node.prefix)
+            for char in data:
+                node = node.children.get(char)
+                if node is None:
+                    break
+                positions.extend(node.prefix)
+            else:
+                positions.extend(node.exact)
+        if len(positions) > 1:
+            positions = sorted(set(positions))
+        return [self.handlers[p] for p in positions]
+
+
+class _IndexedTrigger:
+    """
+    Drop-in for TelegramEventObserver.trigger that only checks the handlers the
+    trie says can match. Same first-match semantics as aiogram's loop.
+    """
+
+    def __init__(self, observer: TelegramEventObserver):
+        self.observer = observer
+        self.trie = CallbackTrie(observer.handlers)
+
+    async def __call__(self, event: CallbackQuery, **kwargs):
+        observer = self.observer
+        if len(observer.handlers) != len(self.trie.handlers):
+            # Handlers registered after indexing; rebuild before dispatching.
+            self.trie = CallbackTrie(observer.handlers)
+        for handler in self.trie.candidates(event.data):
+            kwargs["handler"] = handler
+            result, data = await handler.check(event, **kwargs)
+            if result:
+                kwargs.update(data)
+                try:
+                    wrapped_inner = observer.outer_middleware.wrap_middlewares(
+                        observer._resolve_middlewares(),
+                        handler.call,
+                    )
+                    return await wrapped_inner(event, kwargs)
+                except SkipHandler:
+                    continue
+        return UNHANDLED
+
+
+def index_callback_handlers(router: Router) -> None:
+    """
+    Switch callback_query dispatch of router and all its sub-routers to the
+    prefix trie. Call once, after all routers are included.
+    """
+    for sub_router in router.chain_tail:
+        observer = sub_router.callback_query
+        if not isinstance(observer.trigger, _IndexedTrigger):
+            observer.trigger = _IndexedTrigger(observer)
+
+
+def _sample_data(handler: HandlerObject) -> list:
+    """
+    Callback data strings the handler's data filter accepts, for the benchmark.
+    """
+    keys = data_keys(handler)
+    if keys is None:
+        return []
+    kind, values = keys
+    if kind == "exact":
+        return list(values)
+    return [f"{value}12_wg0" if value.endswith("_") else f"{value}_12_wg0" for value in values]
+
+
+if __name__ == "__main__":
+    import argparse
+    import timeit
+
+    from app import bot
+
+    parser = argparse.ArgumentParser(description="Benchmark callback dispatch across all registered routes.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    root = Router(name="benchmark")
+    for name in bot.routers.__all__:
+        root.include_router(getattr(bot.routers, name))
+
+    observers = [r.callback_query for r in root.chain_tail]
+    tries = [CallbackTrie(o.handlers) for o in observers]
+    sender = User(id=1, is_bot=False, first_name="benchmark")
+    samples = [
+        CallbackQuery(id="1", from_user=sender, chat_instance="1", data=data)
+        for o in observers for h in o.handlers for data in _sample_data(h)
+    ]
+
+    def accepts(handler, event):
+        # The handler's F.data filters only: in aiogram its other filters
+        # (IsAdmin, StateFilter) run too, often before F.data is reached.
+        return all(
+            f.magic.resolve(event) for f in handler.filters or () if f.magic is not None
+        )
+
+    def linear(event):
+        checked = 0
+        for observer in observers:
+            for handler in observer.handlers:
+                checked += 1
+                if accepts(handler, event):
+                    return checked
+        return checked
+
+    def indexed(event):
+        checked = 0
+        for trie in tries:
+            for handler in trie.candidates(event.data):
+                checked += 1
+                if accepts(handler, event):
+                    return checked
+        return checked
+
+    handlers = sum(len(o.handlers) for o in observers)
+    unindexed = sum(len(t.unindexed) for t in tries)
+    print(f"Routes: {len(observers)} routers, {handlers} callback handlers ({unindexed} not indexable), {len(samples)} sample callbacks")
+    for label, select in (("linear", linear), ("trie", indexed)):
+        checked = sum(select(event) for event in samples) / len(samples)
+        best = min(timeit.repeat(lambda: [select(event) for event in samples], number=1, repeat=args.repeat))
+        print(f"{label:>6}: {checked:6.1f} handlers checked per callback, {best / len(samples) * 1e6:7.2f} us per callback")
@@ -0,0 +1,70 @@
+import hashlib
+import logging
+from collections import OrderedDict
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, Message
+
+logger = logging.getLogger("file_ids")
+
+MAX_FILE_IDS = 4096
+
+
+class FileIdCache:
+    """
+    Telegram file_ids of files the bot has already uploaded, keyed by
+    (peer id, content hash), so repeat sends reuse the upload.
+    The content hash ties a file_id to the exact bytes the caller was allowed to fetch.
+    """
+
+    def __init__(self, max_entries: int = MAX_FILE_IDS):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def _key(peer_id: str, content: bytes) -> tuple:
+        return peer_id, hashlib.sha256(content).hexdigest()
+
+    def get(self, peer_id: str, content: bytes) -> str | None:
+        key = self._key(peer_id, content)
+        file_id = self._entries.get(key)
+        if file_id is not None:
+            self._entries.move_to_end(key)
+        return file_id
+
+    def put(self, peer_id: str, content: bytes, file_id: str) -> None:
+        key = self._key(peer_id, content)
+        self._entries[key] = file_id
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, peer_id: str, content: bytes) -> None:
+        self._entries.pop(self._key(peer_id, content), None)
+
+    def invalidate(self, peer_id: str) -> None:
+        for key in [k for k in self._entries if k[0] == peer_id]:
+            del self._entries[key]
+
+
+file_ids = FileIdCache()
+
+
+async def send_cached_file(send, peer_id: str, content: bytes, filename: str, **kwargs) -> Message:
+    """
+    Send a peer file with `send` (e.g. message.answer_document / answer_photo),
+    reusing the Telegram file_id of an earlier upload of the same bytes.
+    Falls back to uploading if Telegram rejects a cached file_id.
+    """
+    file_id = file_ids.get(peer_id, content)
+    if file_id is not None:
+        try:
+            return await send(file_id, **kwargs)
+        except TelegramBadRequest as e:
+            logger.warning(f"Cached file_id for peer {peer_id} rejected, re-uploading: {e}")
+            file_ids.discard(peer_id, content)
+    sent = await send(BufferedInputFile(content, filename=filename), **kwargs)
+    media = sent.photo[-1] if sent.photo else sent.document
+    if media is not None:
+        file_ids.put(peer_id, content, media.file_id)
+    return sent
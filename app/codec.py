@@ -0,0 +1,98 @@
+"""
+JSON codec used for portal responses, request bodies and message rendering.
+Uses orjson when it is installed and falls back to the standard library.
+orjson is optional: pip install -r requirements-optional.txt
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+if orjson is not None:
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def loads(data):
+        """
+        Decode JSON from bytes or str.
+        """
+        return orjson.loads(data)
+
+    def dumps(obj, pretty: bool = False) -> str:
+        """
+        Encode to a JSON str without escaping non-ASCII characters.
+        pretty=True indents by two spaces.
+        """
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode("utf-8")
+
+else:
+    JSONDecodeError = json.JSONDecodeError
+
+    def loads(data):
+        """
+        Decode JSON from bytes or str.
+        """
+        return json.loads(data)
+
+    def dumps(obj, pretty: bool = False) -> str:
+        """
+        Encode to a JSON str without escaping non-ASCII characters.
+        pretty=True indents by two spaces.
+        """
+        if pretty:
+            return json.dumps(obj, indent=2, ensure_ascii=False)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _sample_users(count: int) -> bytes:
+    """
+    Synthetic /user/all payload shaped like WireGuard Portal user records.
+    """
+    users = [
+        {
+            "Identifier": str(100000000 + i),
+            "Email": f"user{i}@example.com",
+            "Source": "db",
+            "ProviderName": "",
+            "IsAdmin": False,
+            "Firstname": "Иван",
+            "Lastname": f"Петров {i}",
+            "Phone": f"+7900{i:07d}",
+            "Department": "Engineering",
+            "Notes": "",
+            "Password": "",
+            "Disabled": False,
+            "DisabledReason": "",
+            "Locked": False,
+            "LockedReason": "",
+            "ApiEnabled": i % 10 == 0,
+            "ApiToken": "",
+            "PeerCount": i % 4,
+        }
+        for i in range(count)
+    ]
+    return json.dumps(users).encode("utf-8")
+
+
+if __name__ == "__main__":
+    import argparse
+    import timeit
+
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoding of a /user/all payload.")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = _sample_users(args.users)
+    print(f"Payload: {args.users} users, {len(payload) / 1024:.0f} KiB, backend: {BACKEND}")
+    baseline = min(timeit.repeat(lambda: json.loads(payload), number=1, repeat=args.repeat))
+    print(f"json.loads:  {baseline * 1000:8.2f} ms")
+    if orjson is None:
+        print("orjson is not installed; codec.loads is json.loads.")
+    else:
+        fast = min(timeit.repeat(lambda: loads(payload), number=1, repeat=args.repeat))
+        print(f"codec.loads: {fast * 1000:8.2f} ms ({baseline / fast:.1f}x faster)")
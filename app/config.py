@@ -13,7 +13,15 @@ class Config:
     DATABASE_URL: str
     TIMEZONE: str = "UTC"
     SERVER_HEALTH_INTERVAL: int = 300
+    SERVER_HEALTH_CONCURRENCY: int = 10
     USER_SYNC_INTERVAL: int = 60
+    USER_SYNC_CONCURRENCY: int = 4
+    USER_SYNC_USER_CONCURRENCY: int = 8
+    USER_SYNC_SERVER_TIMEOUT: int = 120
+    USER_SYNC_VERIFY_INTERVAL: int = 3600
+    PEER_CACHE_DIR: str = ""
+    PEER_CACHE_DISK_LIMIT_MB: int = 256
+    STATS_SUMMARY_INTERVAL: int = 900
     LOGGING: LoggingConfig = field(default_factory=LoggingConfig)  
 
 def load_config() -> Config:
@@ -25,5 +33,13 @@ def load_config() -> Config:
         DATABASE_URL=env.str("DATABASE_URL"),
         TIMEZONE=env.str("TIMEZONE", "UTC"),
         SERVER_HEALTH_INTERVAL=env.int("SERVER_HEALTH_INTERVAL", 300),
+        SERVER_HEALTH_CONCURRENCY=env.int("SERVER_HEALTH_CONCURRENCY", 10),
         USER_SYNC_INTERVAL=env.int("USER_SYNC_INTERVAL", 60),
+        USER_SYNC_CONCURRENCY=env.int("USER_SYNC_CONCURRENCY", 4),
+        USER_SYNC_USER_CONCURRENCY=env.int("USER_SYNC_USER_CONCURRENCY", 8),
+        USER_SYNC_SERVER_TIMEOUT=env.int("USER_SYNC_SERVER_TIMEOUT", 120),
+        USER_SYNC_VERIFY_INTERVAL=env.int("USER_SYNC_VERIFY_INTERVAL", 3600),
+        PEER_CACHE_DIR=env.str("PEER_CACHE_DIR", ""),
+        PEER_CACHE_DISK_LIMIT_MB=env.int("PEER_CACHE_DISK_LIMIT_MB", 256),
+        STATS_SUMMARY_INTERVAL=env.int("STATS_SUMMARY_INTERVAL", 900),
     )
\ No newline at end of file
@@ -1,6 +1,7 @@
 from .base import Base
-from .models import User, Server, ServerAPIData
-from .session import engine, AsyncSessionLocal
+from .models import User, Server, ServerAPIData, PendingSync
+from .session import engine, AsyncSessionLocal, unit_of_work, session_scope, commit, after_unit_of_work, in_unit_of_work
+from .user_cache import invalidate_user
 from .crud import (
     # --- Server CRUD ---
     create_server,
@@ -10,18 +11,25 @@ from .crud import (
     get_server_by_id,
     update_server,
     delete_server_and_api_data,
+    set_server_statuses,
 
     # --- Server API Data CRUD ---
     create_server_api_data,
     get_server_api_data_by_server_id,
     get_server_api_data_by_server_id_and_tg_id,
     get_server_api_data_by_server_id_and_user_id,
+    get_server_api_data_for_server,
+    get_server_api_data_for_user,
+    set_server_api_data_synced,
     get_admin_api_data_for_server,
+    get_admin_api_data_by_server,
 
     # --- User CRUD ---
     create_user,
     get_user_by_id,
+    get_users_by_ids,
     get_user_by_tg_id,
+    get_cached_user_by_tg_id,
     get_user_by_email,
     set_user_registered,
     set_user_authenticated,
@@ -42,6 +50,13 @@ from .crud import (
     delete_invite,
     get_active_invites,
     get_invite_by_used_by,
+    get_invites_by_used_by,
+
+    # --- Pending sync CRUD ---
+    add_pending_sync,
+    get_pending_syncs,
+    delete_pending_syncs,
+    get_pending_sync_watermark,
 )
 
 __all__ = [
@@ -49,8 +64,15 @@ __all__ = [
     "User",
     "Server",
     "ServerAPIData",
+    "PendingSync",
     "engine",
     "AsyncSessionLocal",
+    "unit_of_work",
+    "session_scope",
+    "commit",
+    "after_unit_of_work",
+    "in_unit_of_work",
+    "invalidate_user",
 
     # --- Server CRUD ---
     "create_server",
@@ -60,18 +82,25 @@ __all__ = [
     "get_server_by_id",
     "update_server",
     "delete_server_and_api_data",
+    "set_server_statuses",
 
     # --- Server API Data CRUD ---
     "create_server_api_data",
     "get_server_api_data_by_server_id",
     "get_server_api_data_by_server_id_and_tg_id",
     "get_server_api_data_by_server_id_and_user_id",
+    "get_server_api_data_for_server",
+    "get_server_api_data_for_user",
+    "set_server_api_data_synced",
     "get_admin_api_data_for_server",
+    "get_admin_api_data_by_server",
 
     # --- User CRUD ---
     "create_user",
     "get_user_by_id",
+    "get_users_by_ids",
     "get_user_by_tg_id",
+    "get_cached_user_by_tg_id",
     "get_user_by_email",
     "set_user_registered",
     "set_user_authenticated",
@@ -92,4 +121,11 @@ __all__ = [
     "delete_invite",
     "get_active_invites",
     "get_invite_by_used_by",
+    "get_invites_by_used_by",
+
+    # --- Pending sync CRUD ---
+    "add_pending_sync",
+    "get_pending_syncs",
+    "delete_pending_syncs",
+    "get_pending_sync_watermark",
 ]
\ No newline at end of file
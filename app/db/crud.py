@@ -1,54 +1,56 @@
-from .models import User, Server, ServerAPIData, UserServerAccess, Invite
-from .session import AsyncSessionLocal
-from sqlalchemy import select, update, delete
+from .models import User, Server, ServerAPIData, UserServerAccess, Invite, PendingSync
+from .session import session_scope, commit
+from .user_cache import user_cache, invalidate_user
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # --- Server CRUD ---
 
-async def create_server(server_data: dict):
+async def create_server(server_data: dict, session: AsyncSession = None):
     server_data.pop("country_tag", None)
-    async with AsyncSessionLocal() as session:
+    async with session_scope(session, write=True) as session:
         server = Server(**server_data)
         session.add(server)
-        await session.commit()
+        await commit(session)
         await session.refresh(server)
         return server
 
-async def get_server_by_name(name: str):
-    async with AsyncSessionLocal() as session:
+async def get_server_by_name(name: str, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(Server).where(Server.name == name)
         )
         return result.scalar_one_or_none()
 
-async def get_server_by_api_url(api_url: str):
-    async with AsyncSessionLocal() as session:
+async def get_server_by_api_url(api_url: str, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(Server).where(Server.api_url == api_url)
         )
         return result.scalar_one_or_none()
 
-async def get_all_servers():
-    async with AsyncSessionLocal() as session:
+async def get_all_servers(session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(select(Server))
         return result.scalars().all()
 
-async def get_server_by_id(server_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_server_by_id(server_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         return await session.get(Server, server_id)
 
-async def update_server(server_id: int, name: str, description: str):
-    async with AsyncSessionLocal() as session:
+async def update_server(server_id: int, name: str, description: str, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         server = await session.get(Server, server_id)
         if not server:
             return None
         server.name = name
         server.description = description
-        await session.commit()
+        await commit(session)
         await session.refresh(server)
         return server
 
-async def delete_server_and_api_data(server_id: int):
-    async with AsyncSessionLocal() as session:
+async def delete_server_and_api_data(server_id: int, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         await session.execute(
             delete(ServerAPIData).where(ServerAPIData.server_id == server_id)
         )
@@ -58,27 +60,38 @@ async def delete_server_and_api_data(server_id: int):
         await session.execute(
             delete(Server).where(Server.id == server_id)
         )
-        await session.commit()
+        await commit(session)
+
+async def set_server_statuses(rows: list, session: AsyncSession = None):
+    """
+    Health check results: rows of {"id", "status", "last_checked"}, written in
+    one statement.
+    """
+    if not rows:
+        return
+    async with session_scope(session, write=True) as session:
+        await session.execute(update(Server), rows)
+        await commit(session)
 
 # --- Server API Data CRUD ---
 
-async def create_server_api_data(api_data: dict):
-    async with AsyncSessionLocal() as session:
+async def create_server_api_data(api_data: dict, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         api_entry = ServerAPIData(**api_data)
         session.add(api_entry)
-        await session.commit()
+        await commit(session)
         await session.refresh(api_entry)
         return api_entry
 
-async def get_server_api_data_by_server_id(server_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_server_api_data_by_server_id(server_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(ServerAPIData).where(ServerAPIData.server_id == server_id)
         )
         return result.scalar_one_or_none()
 
-async def get_server_api_data_by_server_id_and_tg_id(server_id: int, tg_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_server_api_data_by_server_id_and_tg_id(server_id: int, tg_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(ServerAPIData).where(
                 ServerAPIData.server_id == server_id,
@@ -87,8 +100,8 @@ async def get_server_api_data_by_server_id_and_tg_id(server_id: int, tg_id: int)
         )
         return result.scalar_one_or_none()
 
-async def get_server_api_data_by_server_id_and_user_id(server_id: int, user_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_server_api_data_by_server_id_and_user_id(server_id: int, user_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(ServerAPIData).where(
                 ServerAPIData.server_id == server_id,
@@ -97,8 +110,39 @@ async def get_server_api_data_by_server_id_and_user_id(server_id: int, user_id:
         )
         return result.scalar_one_or_none()
 
-async def get_admin_api_data_for_server(server_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_server_api_data_for_server(server_id: int, session: AsyncSession = None) -> dict:
+    """
+    All API credentials of a server in one query, keyed by api_login.
+    """
+    async with session_scope(session) as session:
+        result = await session.execute(
+            select(ServerAPIData).where(ServerAPIData.server_id == server_id)
+        )
+        return {api_data.api_login: api_data for api_data in result.scalars().all()}
+
+async def get_server_api_data_for_user(user_id: int, session: AsyncSession = None) -> dict:
+    """
+    A user's API credentials on every server, keyed by server_id.
+    """
+    async with session_scope(session) as session:
+        result = await session.execute(
+            select(ServerAPIData).where(ServerAPIData.user_id == user_id)
+        )
+        return {api_data.server_id: api_data for api_data in result.scalars().all()}
+
+async def set_server_api_data_synced(rows: list, session: AsyncSession = None):
+    """
+    Record what was pushed to the portals: rows of {"id", "synced_revision",
+    "payload_hash"}, written in one statement.
+    """
+    if not rows:
+        return
+    async with session_scope(session, write=True) as session:
+        await session.execute(update(ServerAPIData), rows)
+        await commit(session)
+
+async def get_admin_api_data_for_server(server_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         stmt = (
             select(ServerAPIData)
             .join(User, ServerAPIData.user_id == User.id)
@@ -111,65 +155,111 @@ async def get_admin_api_data_for_server(server_id: int):
         result = await session.execute(stmt)
         return result.scalar_one_or_none()
 
+async def get_admin_api_data_by_server(session: AsyncSession = None) -> dict:
+    """
+    Admin API credentials of every server in one query, keyed by server_id.
+    """
+    async with session_scope(session) as session:
+        result = await session.execute(
+            select(ServerAPIData)
+            .join(User, ServerAPIData.user_id == User.id)
+            .where(User.is_admin == True)
+            .order_by(ServerAPIData.id)
+        )
+        admin_api_data = {}
+        for api_data in result.scalars().all():
+            admin_api_data.setdefault(api_data.server_id, api_data)
+        return admin_api_data
+
 # --- User CRUD ---
 
-async def create_user(user_data: dict):
-    async with AsyncSessionLocal() as session:
+async def create_user(user_data: dict, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         user = User(**user_data)
         session.add(user)
-        await session.commit()
+        invalidate_user(user.tg_id, session)
+        await commit(session)
         await session.refresh(user)
         return user
 
-async def get_user_by_id(user_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_user_by_id(user_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         return await session.get(User, user_id)
 
-async def get_user_by_tg_id(tg_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_users_by_ids(user_ids, session: AsyncSession = None) -> dict:
+    """
+    Users with the given ids in one query, keyed by id.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    async with session_scope(session) as session:
+        result = await session.execute(
+            select(User).where(User.id.in_(user_ids))
+        )
+        return {user.id: user for user in result.scalars().all()}
+
+async def get_user_by_tg_id(tg_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(User).where(User.tg_id == tg_id)
         )
         return result.scalar_one_or_none()
 
-async def get_user_by_email(email: str):
-    async with AsyncSessionLocal() as session:
+async def get_cached_user_by_tg_id(tg_id: int, session: AsyncSession = None):
+    """
+    get_user_by_tg_id through the short-TTL user cache; for auth checks.
+    """
+    hit, user = user_cache.get(tg_id)
+    if hit:
+        return user
+    user = await get_user_by_tg_id(tg_id, session=session)
+    return user_cache.put(tg_id, user)
+
+async def get_user_by_email(email: str, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(User).where(User.email == email)
         )
         return result.scalar_one_or_none()
 
-async def set_user_registered(tg_id: int):
-    async with AsyncSessionLocal() as session:
+async def set_user_registered(tg_id: int, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         await session.execute(
             update(User).where(User.tg_id == tg_id).values(is_registered=True)
         )
-        await session.commit()
-
-async def set_user_authenticated(tg_id: int, value: bool = True):
-    async with AsyncSessionLocal() as session:
+        invalidate_user(tg_id, session)
+        await commit(session)
+
+async def set_user_authenticated(tg_id: int, value: bool = True, is_admin: bool = None, session: AsyncSession = None):
+    values = {"is_authenticated": value}
+    if is_admin is not None:
+        values["is_admin"] = is_admin
+        values["revision"] = User.revision + 1
+    async with session_scope(session, write=True) as session:
         await session.execute(
-            update(User).where(User.tg_id == tg_id).values(is_authenticated=value)
+            update(User).where(User.tg_id == tg_id).values(**values)
         )
-        await session.commit()
+        invalidate_user(tg_id, session)
+        await commit(session)
 
-async def get_all_users():
-    async with AsyncSessionLocal() as session:
+async def get_all_users(session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(select(User))
         return result.scalars().all()
 
 # --- UserServerAccess CRUD ---
 
-async def add_user_server_access(user_id: int, server_id: int):
-    async with AsyncSessionLocal() as session:
+async def add_user_server_access(user_id: int, server_id: int, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         access = UserServerAccess(user_id=user_id, server_id=server_id)
         session.add(access)
-        await session.commit()
+        await commit(session)
         await session.refresh(access)
         return access
 
-async def get_user_server_access(user_id: int, server_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_user_server_access(user_id: int, server_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(UserServerAccess).where(
                 UserServerAccess.user_id == user_id,
@@ -178,34 +268,34 @@ async def get_user_server_access(user_id: int, server_id: int):
         )
         return result.scalar_one_or_none()
 
-async def get_servers_for_user(user_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_servers_for_user(user_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(UserServerAccess.server_id).where(UserServerAccess.user_id == user_id)
         )
         return [row[0] for row in result.all()]
 
-async def get_users_for_server(server_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_users_for_server(server_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(UserServerAccess.user_id).where(UserServerAccess.server_id == server_id)
         )
         return [row[0] for row in result.all()]
 
-async def remove_user_server_access(user_id: int, server_id: int):
-    async with AsyncSessionLocal() as session:
+async def remove_user_server_access(user_id: int, server_id: int, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         await session.execute(
             delete(UserServerAccess).where(
                 UserServerAccess.user_id == user_id,
                 UserServerAccess.server_id == server_id
             )
         )
-        await session.commit()
+        await commit(session)
 
 # --- Invite CRUD ---
 
-async def create_invite(code: str, server_ids: list, is_admin: bool = False, admin_tg_id: int = None):
-    async with AsyncSessionLocal() as session:
+async def create_invite(code: str, server_ids: list, is_admin: bool = False, admin_tg_id: int = None, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         invite = Invite(
             code=code,
             server_ids=server_ids,
@@ -213,52 +303,107 @@ async def create_invite(code: str, server_ids: list, is_admin: bool = False, adm
             admin_tg_id=admin_tg_id 
         )
         session.add(invite)
-        await session.commit()
+        await commit(session)
         await session.refresh(invite)
         return invite
 
-async def get_invite_by_code(code: str):
-    async with AsyncSessionLocal() as session:
+async def get_invite_by_code(code: str, session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(Invite).where(Invite.code == code)
         )
         return result.scalar_one_or_none()
 
-async def set_invite_used(invite_id: int, tg_id: int):
-    async with AsyncSessionLocal() as session:
+async def set_invite_used(invite_id: int, tg_id: int, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         await session.execute(
             update(Invite)
             .where(Invite.id == invite_id)
             .values(used_by=tg_id, is_active=False)
         )
-        await session.commit()
+        await commit(session)
 
-async def deactivate_invite(invite_id: int):
-    async with AsyncSessionLocal() as session:
+async def deactivate_invite(invite_id: int, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         await session.execute(
             update(Invite)
             .where(Invite.id == invite_id)
             .values(is_active=False)
         )
-        await session.commit()
+        await commit(session)
 
-async def delete_invite(invite_id: int):
-    async with AsyncSessionLocal() as session:
+async def delete_invite(invite_id: int, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
         await session.execute(
             delete(Invite).where(Invite.id == invite_id)
         )
-        await session.commit()
+        await commit(session)
 
-async def get_active_invites():
-    async with AsyncSessionLocal() as session:
+async def get_active_invites(session: AsyncSession = None):
+    async with session_scope(session) as session:
         result = await session.execute(
             select(Invite).where(Invite.is_active == True)
         )
         return result.scalars().all()
     
-async def get_invite_by_used_by(user_id: int):
-    async with AsyncSessionLocal() as session:
+async def get_invite_by_used_by(tg_id: int, session: AsyncSession = None):
+    async with session_scope(session) as session:
+        result = await session.execute(
+            select(Invite).where(Invite.used_by == tg_id).order_by(Invite.id.desc()).limit(1)
+        )
+        return result.scalar_one_or_none()
+
+async def get_invites_by_used_by(tg_ids, session: AsyncSession = None) -> dict:
+    """
+    Invites redeemed by the given Telegram ids in one query, keyed by tg_id.
+    If a user redeemed several invites, the most recent one wins.
+    """
+    tg_ids = list(tg_ids)
+    if not tg_ids:
+        return {}
+    async with session_scope(session) as session:
         result = await session.execute(
-            select(Invite).where(Invite.used_by == user_id)
+            select(Invite).where(Invite.used_by.in_(tg_ids)).order_by(Invite.id)
+        )
+        return {invite.used_by: invite for invite in result.scalars().all()}
+
+# --- Pending sync CRUD ---
+
+async def add_pending_sync(server_ids, user_id: int = None, session: AsyncSession = None):
+    async with session_scope(session, write=True) as session:
+        for server_id in set(server_ids):
+            session.add(PendingSync(server_id=server_id, user_id=user_id))
+        await commit(session)
+
+async def get_pending_syncs(user_id: int = None, server_id: int = None, session: AsyncSession = None):
+    async with session_scope(session) as session:
+        stmt = select(PendingSync)
+        if user_id is not None:
+            stmt = stmt.where(PendingSync.user_id == user_id)
+        if server_id is not None:
+            stmt = stmt.where(PendingSync.server_id == server_id)
+        result = await session.execute(stmt.order_by(PendingSync.id))
+        return result.scalars().all()
+
+async def delete_pending_syncs(up_to_id: int, server_id: int, user_id: int = None, user_ids=None, session: AsyncSession = None):
+    """
+    Clear markers of server_id (only user_id's, or only those of user_ids, if
+    given) created up to up_to_id, so markers added while a sync was running
+    survive it.
+    """
+    async with session_scope(session, write=True) as session:
+        stmt = delete(PendingSync).where(
+            PendingSync.id <= up_to_id,
+            PendingSync.server_id == server_id,
         )
-        return result.scalar_one_or_none()
\ No newline at end of file
+        if user_id is not None:
+            stmt = stmt.where(PendingSync.user_id == user_id)
+        if user_ids is not None:
+            stmt = stmt.where(PendingSync.user_id.in_(list(user_ids)))
+        await session.execute(stmt)
+        await commit(session)
+
+async def get_pending_sync_watermark(session: AsyncSession = None) -> int:
+    async with session_scope(session) as session:
+        result = await session.execute(select(func.max(PendingSync.id)))
+        return result.scalar() or 0
@@ -1,10 +1,33 @@
 import asyncio
+import logging
+from sqlalchemy import inspect, text
 from .models import Base
 from .session import engine
 
+logger = logging.getLogger("db.init")
+
+
+def _add_missing_columns(conn):
+    """
+    create_all does not alter existing tables: add columns introduced after a
+    table was created. New columns must be nullable or have a server_default.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = conn.dialect.ddl_compiler(conn.dialect, None).get_column_specification(column)
+                logger.info(f"Adding column {table.name}.{column.name}")
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
 
 if __name__ == "__main__":
-    asyncio.run(init_db())
\ No newline at end of file
+    asyncio.run(init_db())
@@ -5,6 +5,7 @@ from sqlalchemy import (
     String,
     DateTime,
     Boolean,
+    Float,
     ForeignKey,
     JSON,
     func,
@@ -26,6 +27,8 @@ class User(Base):
     is_authenticated = Column(Boolean, default=False, nullable=False)
     is_registered = Column(Boolean, default=False, nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
+    # Bumped whenever a field pushed to the portals changes; see user_sync.
+    revision = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -43,6 +46,9 @@ class Server(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     last_checked = Column(DateTime, default=None)
+    # Request budget for this server's portal; NULL means the client defaults.
+    rate_limit_rps = Column(Float, nullable=True)
+    max_in_flight = Column(Integer, nullable=True)
 
     api_data = relationship("ServerAPIData", back_populates="server", uselist=False)
 
@@ -65,6 +71,10 @@ class ServerAPIData(Base):
     password = Column(String(64), nullable=False)
     api_login = Column(String(128), nullable=False)
     api_password = Column(String(64), nullable=False)
+    # User revision and payload hash last pushed to the portal; NULL when unknown
+    # or the portal user was deleted.
+    synced_revision = Column(Integer, nullable=True)
+    payload_hash = Column(String(64), nullable=True)
 
     server = relationship("Server", back_populates="api_data")
     user = relationship("User")
@@ -87,3 +97,19 @@ class Invite(Base):
     used_by = Column(BigInteger, ForeignKey("users.tg_id"), nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
+
+
+class PendingSync(Base):
+    """
+    A (user, server) pair whose portal state may not match the DB yet.
+    user_id NULL marks the whole server. Cleared once a sync covers it;
+    whatever is left is picked up by the next full sweep.
+    """
+    __tablename__ = "pending_sync"
+
+    id = Column(Integer, primary_key=True, index=True)
+    server_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=True, index=True)
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
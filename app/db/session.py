@@ -1,4 +1,9 @@
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
+
 from app.config import load_config
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
@@ -6,4 +11,132 @@ config = load_config()
 DATABASE_URL = config.DATABASE_URL
 
 engine = create_async_engine(DATABASE_URL, echo=False)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
\ No newline at end of file
+AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+# (session, owning task) of the unit of work the current task runs in.
+_unit_of_work = contextvars.ContextVar("db_unit_of_work", default=None)
+
+# session.info keys: callbacks registered with after_unit_of_work, and how many
+# session_scope blocks are open on a unit of work's session.
+_AFTER_KEY = "after_unit_of_work"
+_DEPTH_KEY = "scope_depth"
+
+
+def _current_session() -> AsyncSession | None:
+    # An AsyncSession must not be shared between concurrently running tasks, so
+    # tasks spawned from inside a unit of work get sessions of their own.
+    current = _unit_of_work.get()
+    if current is not None and current[1] is asyncio.current_task():
+        return current[0]
+    return None
+
+
+@asynccontextmanager
+async def unit_of_work():
+    """
+    Run a block (one Telegram update, one sync pass) in a single session; CRUD
+    calls inside it reuse that session. Each CRUD call (outermost session_scope
+    block) commits when it ends, so no transaction or pooled connection is held
+    between them, e.g. across portal calls, retries and backoff. Other failures
+    (e.g. Telegram refusing a message edit) keep the writes already made.
+    Nested units of work join the outer one.
+    """
+    session = _current_session()
+    if session is not None:
+        yield session
+        return
+    async with AsyncSessionLocal() as session:
+        token = _unit_of_work.set((session, asyncio.current_task()))
+        try:
+            yield session
+        except SQLAlchemyError:
+            await session.rollback()
+            raise
+        except BaseException:
+            await _commit_or_rollback(session)
+            raise
+        else:
+            await session.commit()
+        finally:
+            _unit_of_work.reset(token)
+            for callback in session.info.pop(_AFTER_KEY, ()):
+                callback()
+
+
+def in_unit_of_work() -> bool:
+    return _current_session() is not None
+
+
+def after_unit_of_work(callback) -> None:
+    """
+    Call callback() once the current task's unit of work has ended (committed or
+    rolled back), or right away outside one. For work that runs in other tasks and
+    must see this unit's writes, e.g. queued syncs.
+    """
+    session = _current_session()
+    if session is None:
+        callback()
+    else:
+        session.info.setdefault(_AFTER_KEY, []).append(callback)
+
+
+async def _commit_or_rollback(session: AsyncSession) -> None:
+    try:
+        await session.commit()
+    except SQLAlchemyError:
+        await session.rollback()
+
+
+@asynccontextmanager
+async def session_scope(session: AsyncSession = None, write: bool = False):
+    """
+    Session for a CRUD call: the one passed in, else the current unit of work's,
+    else a short-lived session of its own. Writes on a shared session run in a
+    savepoint, so a failed write only undoes itself. The outermost block on a unit
+    of work's session then commits, ending the transaction.
+    """
+    if session is None:
+        session = _current_session()
+    if session is not None:
+        if session is _current_session() and not session.info.get(_DEPTH_KEY):
+            async with _transaction_scope(session, write):
+                yield session
+            return
+        if write:
+            async with session.begin_nested():
+                yield session
+        else:
+            yield session
+        return
+    async with AsyncSessionLocal() as session:
+        session.info["autocommit"] = True
+        yield session
+
+
+@asynccontextmanager
+async def _transaction_scope(session: AsyncSession, write: bool):
+    session.info[_DEPTH_KEY] = 1
+    try:
+        if write:
+            async with session.begin_nested():
+                yield
+        else:
+            yield
+    except BaseException:
+        await _commit_or_rollback(session)
+        raise
+    else:
+        await session.commit()
+    finally:
+        session.info.pop(_DEPTH_KEY, None)
+
+
+async def commit(session: AsyncSession) -> None:
+    """
+    Commit a short-lived CRUD session; a shared session is only flushed and is
+    committed when its outermost session_scope block ends.
+    """
+    if session.info.get("autocommit"):
+        await session.commit()
+    else:
+        await session.flush()
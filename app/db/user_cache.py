@@ -0,0 +1,87 @@
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# Seconds a looked-up user stays cached; also bounds how long a change made
+# outside this process (or a missed invalidation) can go unnoticed.
+USER_CACHE_TTL = 30
+MAX_CACHED_USERS = 4096
+
+# session.info key of the tg_ids whose rows the session changed.
+_STALE_KEY = "stale_user_tg_ids"
+
+
+class UserCache:
+    """
+    Short-TTL in-process cache of User rows by Telegram id, so auth checks
+    don't hit the database for every filter of every update.
+    "No such user" is cached too, as None.
+    """
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_entries: int = MAX_CACHED_USERS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict = {}
+
+    def get(self, tg_id: int):
+        """
+        (True, user) on a fresh hit, (False, None) otherwise.
+        """
+        entry = self._entries.get(tg_id)
+        if entry is None:
+            return False, None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[tg_id]
+            return False, None
+        return True, user
+
+    def put(self, tg_id: int, user):
+        """
+        Cache a detached copy of user and return it. The copy is never attached to
+        a session, so later updates, rollbacks or expiry there cannot touch it.
+        """
+        if user is not None:
+            user = _snapshot(user)
+        if len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            for key in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+                del self._entries[key]
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+        self._entries[tg_id] = (time.monotonic() + self.ttl, user)
+        return user
+
+    def invalidate(self, tg_id: int) -> None:
+        self._entries.pop(tg_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _snapshot(obj):
+    mapper = inspect(obj).mapper
+    return mapper.class_(**{attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs})
+
+
+user_cache = UserCache()
+
+
+def invalidate_user(tg_id: int, session=None) -> None:
+    """
+    Drop a user's cached row. Pass the session that made the change: inside a
+    unit of work the row is dropped again once it commits, so a lookup made
+    before the commit cannot keep the old version cached.
+    """
+    if tg_id is None:
+        return
+    user_cache.invalidate(tg_id)
+    if session is not None:
+        session.info.setdefault(_STALE_KEY, set()).add(tg_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session) -> None:
+    for tg_id in session.info.pop(_STALE_KEY, ()):
+        user_cache.invalidate(tg_id)
@@ -1,5 +1,6 @@
 from .interfaces import (
     get_all_interfaces,
+    iter_all_interfaces,
     get_interface_by_id,
     update_interface_by_id,
     create_interface,
@@ -15,6 +16,7 @@ from .metrics import (
 
 from .users import (
     get_all_users,
+    iter_all_users,
     get_user_by_id,
     update_user_by_id,
     delete_user_by_id,
@@ -33,11 +35,37 @@ from .provisioning import (
     get_peer_qr,
 )
 
+from .client import (
+    WireGuardClient,
+    get_client,
+    get_client_for,
+    configure_server_rate_limits,
+    close_clients,
+    expected_errors,
+)
+
+from .bulk import (
+    BulkResult,
+    run_bulk,
+    bulk_create_users,
+    bulk_update_users,
+    bulk_delete_users,
+    bulk_create_peers,
+    bulk_delete_peers,
+)
+
+from .breaker import is_server_available
+from .retry import RetryPolicy, RESEND
+from .ratelimit import background_priority, configure_rate_limit
+from .artifacts import configure_peer_cache
+from .telemetry import get_telemetry
+from .deadline import deadline, INTERACTIVE_DEADLINE
 
-from .exceptions import WireGuardAPIError
+from .exceptions import WireGuardAPIError, ServerUnavailableError, DeadlineExceededError
 
 __all__ = [
     "get_all_interfaces",
+    "iter_all_interfaces",
     "get_interface_by_id",
     "update_interface_by_id",
     "create_interface",
@@ -47,6 +75,7 @@ __all__ = [
     "get_user_metrics",
     "get_peer_metrics",
     "get_all_users",
+    "iter_all_users",
     "get_user_by_id",
     "update_user_by_id",
     "delete_user_by_id",
@@ -56,6 +85,30 @@ __all__ = [
     "get_peer_config",
     "get_peer_qr",
     "WireGuardAPIError",
+    "ServerUnavailableError",
     "get_peer_by_id",
     "delete_peer_by_id",
+    "WireGuardClient",
+    "get_client",
+    "get_client_for",
+    "configure_server_rate_limits",
+    "close_clients",
+    "expected_errors",
+    "is_server_available",
+    "RetryPolicy",
+    "RESEND",
+    "BulkResult",
+    "run_bulk",
+    "bulk_create_users",
+    "bulk_update_users",
+    "bulk_delete_users",
+    "bulk_create_peers",
+    "bulk_delete_peers",
+    "background_priority",
+    "configure_rate_limit",
+    "configure_peer_cache",
+    "get_telemetry",
+    "deadline",
+    "INTERACTIVE_DEADLINE",
+    "DeadlineExceededError",
 ]
\ No newline at end of file
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("api.artifacts")
+
+MAX_MEMORY_BYTES = 16 * 1024 * 1024
+MAX_DISK_BYTES = 256 * 1024 * 1024
+# How often, at most, the disk tier is swept down to its size budget.
+DISK_SWEEP_INTERVAL = 600
+# How long a peer revision learned from a peer record is trusted before the
+# record is fetched again.
+REVISION_TTL = 300
+
+
+def peer_revision(peer: dict) -> str:
+    """
+    Content hash of a peer record; any change to the peer yields a new revision.
+    """
+    canonical = json.dumps(peer, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+class ArtifactCache:
+    """
+    Cache of rendered peer artifacts (wg-quick configs, QR codes) keyed by
+    (server, api user, peer id, peer revision, kind).
+
+    Entries live in an in-memory LRU bounded by total size and, if a directory is
+    configured, in an on-disk tier that survives restarts. Disk files contain peer
+    private keys and are created readable by the owner only. The disk tier is
+    swept periodically: the least recently used files (stale revisions of peers
+    that are no longer viewed, first) go once it exceeds max_disk_bytes.
+    """
+
+    def __init__(self, max_bytes: int = MAX_MEMORY_BYTES, disk_dir: str | None = None, max_disk_bytes: int = MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._revisions: dict = {}
+        self._swept_at = 0.0
+
+    # --- Revisions ---
+
+    def revision(self, base_url: str, peer_id: str) -> str | None:
+        known = self._revisions.get((base_url, peer_id))
+        if known is None or time.monotonic() - known[1] > REVISION_TTL:
+            return None
+        return known[0]
+
+    async def set_revision(self, base_url: str, peer_id: str, revision: str) -> None:
+        previous = self._revisions.get((base_url, peer_id))
+        self._revisions[(base_url, peer_id)] = (revision, time.monotonic())
+        if previous is not None and previous[0] != revision:
+            await self.invalidate(base_url, peer_id, keep_revision=revision)
+
+    # --- Entries ---
+
+    async def get(self, key: tuple) -> bytes | None:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            return data
+        if self.disk_dir:
+            data = await asyncio.to_thread(self._read_file, self._path(key))
+            if data is not None:
+                self._remember(key, data)
+        return data
+
+    async def put(self, key: tuple, data: bytes) -> None:
+        self._remember(key, data)
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._write_file, self._path(key), data)
+            except OSError as e:
+                logger.warning(f"Failed to write peer artifact to disk cache: {e}")
+            if time.monotonic() - self._swept_at >= DISK_SWEEP_INTERVAL:
+                await self.sweep()
+
+    async def sweep(self) -> None:
+        """
+        Trim the disk tier to max_disk_bytes, least recently used files first.
+        """
+        self._swept_at = time.monotonic()
+        if self.disk_dir:
+            removed = await asyncio.to_thread(self._sweep_files, self.disk_dir, self.max_disk_bytes)
+            if removed:
+                logger.info(f"Removed {removed} peer artifacts from the disk cache")
+
+    async def invalidate(self, base_url: str, peer_id: str | None = None, keep_revision: str | None = None) -> None:
+        """
+        Drop cached artifacts of one peer, or of every peer of the server if peer_id is None.
+        keep_revision: spare entries of this revision (used when a new revision is learned).
+        """
+        for key in [
+            k for k in self._entries
+            if k[0] == base_url and (peer_id is None or k[2] == peer_id) and k[3] != keep_revision
+        ]:
+            self.size -= len(self._entries.pop(key))
+        if peer_id is None:
+            for rev_key in [k for k in self._revisions if k[0] == base_url]:
+                del self._revisions[rev_key]
+        elif keep_revision is None:
+            self._revisions.pop((base_url, peer_id), None)
+        if self.disk_dir:
+            await asyncio.to_thread(self._remove_files, base_url, peer_id, keep_revision)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._revisions.clear()
+        self.size = 0
+
+    def _remember(self, key: tuple, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    # --- Disk tier ---
+
+    def _path(self, key: tuple) -> str:
+        base_url, api_user, peer_id, revision, kind = key
+        name = f"{_digest(base_url)}-{_digest(peer_id)}-{revision}-{_digest(api_user)}.{kind}"
+        return os.path.join(self.disk_dir, name)
+
+    @staticmethod
+    def _read_file(path: str) -> bytes | None:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # The sweep evicts by modification time: a hit keeps the file.
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove_files(self, base_url: str, peer_id: str | None, keep_revision: str | None) -> None:
+        prefix = _digest(base_url) + "-"
+        if peer_id is not None:
+            prefix += _digest(peer_id) + "-"
+        try:
+            names = os.listdir(self.disk_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.startswith(prefix):
+                continue
+            if keep_revision is not None and name[len(prefix):].startswith(keep_revision + "-"):
+                continue
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _sweep_files(disk_dir: str, max_bytes: int) -> int:
+        files = []
+        total = 0
+        try:
+            entries = list(os.scandir(disk_dir))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+_artifacts = ArtifactCache()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    return _artifacts
+
+
+def configure_peer_cache(disk_dir: str | None = None, max_bytes: int = MAX_MEMORY_BYTES, max_disk_bytes: int = MAX_DISK_BYTES) -> None:
+    """
+    Set the memory and disk budgets and optional on-disk directory of the peer
+    artifact cache. The directory is created (or restricted) to mode 0700.
+    """
+    _artifacts.max_bytes = max_bytes
+    _artifacts.max_disk_bytes = max_disk_bytes
+    _artifacts.disk_dir = disk_dir or None
+    _artifacts._swept_at = 0.0
+    if _artifacts.disk_dir:
+        try:
+            os.makedirs(_artifacts.disk_dir, mode=0o700, exist_ok=True)
+            os.chmod(_artifacts.disk_dir, 0o700)
+        except OSError as e:
+            logger.warning(f"Failed to prepare peer cache directory {_artifacts.disk_dir}: {e}")
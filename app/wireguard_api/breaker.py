@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("api.breaker")
+
+FAILURE_THRESHOLD = 3
+RECOVERY_TIMEOUT = 30
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Per-server circuit breaker.
+
+    closed:    requests pass; consecutive failures are counted.
+    open:      requests fail immediately; a background probe checks the server
+               every RECOVERY_TIMEOUT seconds.
+    half-open: the recovery timeout elapsed; one trial request (or probe) is let
+               through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, recovery_timeout: float = RECOVERY_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_progress = False
+        self._probe_task: asyncio.Task | None = None
+
+    def allow_request(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN and not self._trial_in_progress:
+            self._trial_in_progress = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+
+    def release_trial(self) -> None:
+        """
+        Give up a half-open trial without an outcome (e.g. the request was cancelled).
+        """
+        self._trial_in_progress = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._trial_in_progress = False
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_progress = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != OPEN:
+                self._set_state(OPEN)
+
+    def start_probe(self, probe) -> None:
+        """
+        Start probing the server in the background until the circuit closes.
+        probe: coroutine function that raises if the server is still unavailable.
+        """
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_loop(probe))
+
+    async def _probe_loop(self, probe) -> None:
+        while self.state != CLOSED:
+            await asyncio.sleep(self.retry_after() or 1)
+            if not self.allow_request():
+                continue
+            try:
+                await probe()
+                self.record_success()
+            except Exception as e:
+                logger.warning(f"Recovery probe for {self.name} failed: {e}")
+                self.record_failure()
+
+    def stop_probe(self) -> None:
+        if self._probe_task is not None and not self._probe_task.done():
+            self._probe_task.cancel()
+        self._probe_task = None
+
+    def _set_state(self, state: str) -> None:
+        logger.info(f"Circuit for {self.name}: {self.state} -> {state}")
+        self.state = state
+
+
+_breakers: dict = {}
+
+
+def get_breaker(base_url: str) -> CircuitBreaker:
+    """
+    Get the circuit breaker shared by all clients of a server.
+    """
+    breaker = _breakers.get(base_url)
+    if breaker is None:
+        breaker = CircuitBreaker(base_url)
+        _breakers[base_url] = breaker
+    return breaker
+
+
+def is_server_available(base_url: str) -> bool:
+    """
+    False while the server's circuit is open or half-open.
+    """
+    breaker = _breakers.get(base_url.rstrip("/"))
+    return breaker is None or breaker.state == CLOSED
+
+
+def clear_breakers() -> None:
+    for breaker in _breakers.values():
+        breaker.stop_probe()
+    _breakers.clear()
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from app.wireguard_api.client import WireGuardClient
+
+logger = logging.getLogger("api.bulk")
+
+BULK_CONCURRENCY = 8
+
+
+@dataclass
+class BulkResult:
+    item: Any
+    result: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def run_bulk(operation, items, concurrency: int = BULK_CONCURRENCY) -> list[BulkResult]:
+    """
+    Run operation(item) for every item with at most `concurrency` calls in flight.
+    Failures are collected per item instead of aborting the batch.
+    Results are returned in the order of `items`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(item) -> BulkResult:
+        async with semaphore:
+            try:
+                return BulkResult(item=item, result=await operation(item))
+            except Exception as e:
+                return BulkResult(item=item, error=e)
+
+    results = await asyncio.gather(*(run_one(item) for item in items))
+    failed = sum(1 for r in results if not r.ok)
+    if failed:
+        logger.warning(f"Bulk operation finished with {failed}/{len(results)} failures")
+    return list(results)
+
+
+async def bulk_create_users(client: WireGuardClient, payloads: list, concurrency: int = BULK_CONCURRENCY) -> list[BulkResult]:
+    return await run_bulk(client.create_user, payloads, concurrency)
+
+
+async def bulk_update_users(client: WireGuardClient, updates: dict, concurrency: int = BULK_CONCURRENCY) -> list[BulkResult]:
+    """
+    updates: {user_id: user_data}. BulkResult.item is the (user_id, user_data) pair.
+    """
+    return await run_bulk(lambda item: client.update_user_by_id(*item), list(updates.items()), concurrency)
+
+
+async def bulk_delete_users(client: WireGuardClient, user_ids: list, concurrency: int = BULK_CONCURRENCY) -> list[BulkResult]:
+    return await run_bulk(client.delete_user_by_id, user_ids, concurrency)
+
+
+async def bulk_create_peers(client: WireGuardClient, interface_id: str, user_ids: list, concurrency: int = BULK_CONCURRENCY) -> list[BulkResult]:
+    return await run_bulk(lambda user_id: client.create_peer(interface_id, user_id), user_ids, concurrency)
+
+
+async def bulk_delete_peers(client: WireGuardClient, peer_ids: list, concurrency: int = BULK_CONCURRENCY) -> list[BulkResult]:
+    return await run_bulk(client.delete_peer_by_id, peer_ids, concurrency)
@@ -0,0 +1,119 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+MAX_ENTRIES_PER_SERVER = 512
+
+# Seconds a successful GET response stays fresh, by logical endpoint.
+# Endpoints not listed here are never cached.
+ENDPOINT_TTLS = {
+    "interface/all": 30,
+    "interface/by-id": 30,
+    "user/all": 15,
+    "user/by-id": 15,
+    "provisioning/data/user-info": 10,
+}
+
+# A write to the key resource invalidates cached reads of every listed resource:
+# peers change interface/user peer counts, interfaces and users own peers, and
+# deleting or disabling a user changes its peers' interface counts and status.
+INVALIDATES = {
+    "interface": {"interface", "peer", "provisioning"},
+    "user": {"user", "peer", "provisioning", "interface"},
+    "peer": {"peer", "provisioning", "interface", "user"},
+    "provisioning": {"peer", "provisioning", "interface", "user"},
+}
+
+
+def endpoint_name(path: str) -> str:
+    """
+    Logical endpoint of a request path, without identifiers:
+    '/interface/by-id/wg0' -> 'interface/by-id', '/user/all' -> 'user/all'.
+    """
+    parts = path.strip("/").split("/")
+    if len(parts) > 2 and parts[1].startswith("by-"):
+        parts = parts[:2]
+    return "/".join(parts)
+
+
+def resource_name(path: str) -> str:
+    """
+    Top-level resource of a request path: '/interface/by-id/wg0' -> 'interface'.
+    """
+    return path.strip("/").split("/", 1)[0]
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str | None
+    expires_at: float
+    resource: str
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+class ResponseCache:
+    """
+    LRU cache of raw GET response bodies for one server.
+    Expired entries are kept so they can be revalidated with If-None-Match.
+    Every invalidation bumps the generation of the resources it affects, so a
+    response to a read that started before a write can be told apart.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES_PER_SERVER):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._generations: dict = {}
+
+    def generation(self, resource: str) -> int:
+        return self._generations.get(resource, 0)
+
+    def get(self, key) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry: CachedResponse, generation: int = None) -> bool:
+        """
+        Store entry, unless generation (taken when the request started) shows its
+        resource was invalidated since: the body may predate the write.
+        """
+        if generation is not None and generation != self.generation(entry.resource):
+            return False
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, resource: str) -> None:
+        affected = INVALIDATES.get(resource, {resource})
+        for name in affected:
+            self._generations[name] = self.generation(name) + 1
+        for key in [k for k, e in self._entries.items() if e.resource in affected]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_caches: dict = {}
+
+
+def get_cache(base_url: str) -> ResponseCache:
+    """
+    Get the response cache shared by all clients of a server.
+    """
+    cache = _caches.get(base_url)
+    if cache is None:
+        cache = ResponseCache()
+        _caches[base_url] = cache
+    return cache
+
+
+def clear_caches() -> None:
+    _caches.clear()
@@ -0,0 +1,603 @@
+import aiohttp
+import asyncio
+import contextvars
+import logging
+import time
+import urllib.parse
+from contextlib import contextmanager
+from app import codec
+from app.wireguard_api.cache import (
+    ENDPOINT_TTLS,
+    CachedResponse,
+    clear_caches,
+    endpoint_name,
+    get_cache,
+    resource_name,
+)
+from app.wireguard_api.artifacts import get_artifact_cache, peer_revision
+from app.wireguard_api.breaker import CLOSED, OPEN, clear_breakers, get_breaker
+from app.wireguard_api.deadline import check_deadline, enforce_deadline, remaining
+from app.wireguard_api.exceptions import DeadlineExceededError, WireGuardAPIError, ServerUnavailableError
+from app.wireguard_api.qr import QR_AVAILABLE, render_qr, shutdown_qr_pool
+from app.wireguard_api.ratelimit import clear_limiters, configure_rate_limit, current_priority, get_limiter
+from app.wireguard_api.retry import (
+    RESEND,
+    DEFAULT_RETRY_POLICY,
+    RetryPolicy,
+    clear_backoffs,
+    get_backoff,
+    is_transient,
+)
+from app.wireguard_api.singleflight import SingleFlight
+from app.wireguard_api.streaming import STREAM_CHUNK_SIZE, iter_json_array
+from app.wireguard_api.telemetry import get_telemetry
+
+logger = logging.getLogger("api.client")
+
+REQUEST_TIMEOUT = 10
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 8
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+
+_session: aiohttp.ClientSession | None = None
+_clients: dict = {}
+_flights = SingleFlight()
+_expected_errors = contextvars.ContextVar("api_expected_errors", default=frozenset())
+
+
+@contextmanager
+def expected_errors(*statuses: int):
+    """
+    Log error responses with these statuses inside this block at DEBUG instead of
+    ERROR, for calls where the caller handles them (e.g. 404 from an existence check).
+    They are still raised as WireGuardAPIError.
+    """
+    token = _expected_errors.set(_expected_errors.get() | frozenset(statuses))
+    try:
+        yield
+    finally:
+        _expected_errors.reset(token)
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """
+    Return the pooled HTTP session shared by all clients, creating it on first use.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            use_dns_cache=True,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        _session = aiohttp.ClientSession(connector=connector, json_serialize=codec.dumps)
+    return _session
+
+
+class WireGuardClient:
+    """
+    WireGuard Portal API client bound to one server and one set of API credentials.
+    """
+
+    def __init__(self, api_url: str, api_user: str, api_pass: str, retry_policy: RetryPolicy = None):
+        self.base_url = api_url.rstrip("/")
+        self.api_user = api_user
+        self._auth_header = aiohttp.BasicAuth(api_user, api_pass).encode()
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        self.cache = get_cache(self.base_url)
+        self.breaker = get_breaker(self.base_url)
+        self.backoff = get_backoff(self.base_url, self.retry_policy)
+        self.limiter = get_limiter(self.base_url)
+        self.artifacts = get_artifact_cache()
+        self.telemetry = get_telemetry()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict = None,
+        json: dict = None,
+        expected_status: int = 200,
+        accept: str = "application/json",
+        fresh: bool = False,
+        idempotent: bool = None,
+        retry_guard=None,
+    ):
+        """
+        Send a request to the portal and return the decoded response body.
+        JSON bodies are decoded to Python objects, text/plain to str, anything else to bytes.
+        Cacheable GETs are served from the server's response cache while fresh; with
+        fresh=True the portal is always contacted (conditionally, if an ETag is known).
+        Concurrent identical GETs share one in-flight request.
+        While the server's circuit breaker is open, ServerUnavailableError is raised immediately.
+        Inside a deadline() block the call (retries included) is bounded by the remaining
+        budget and raises DeadlineExceededError when it runs out.
+        A failed call counts once towards opening the breaker, after its retries run out.
+
+        Transient failures are retried with backoff when the request is idempotent
+        (GETs by default) or when retry_guard confirms a resend is safe. retry_guard is
+        a coroutine function awaited before each resend: it returns RESEND, or the result
+        to return instead if the first attempt turns out to have been applied.
+        """
+        url = self.base_url + path
+        ttl = ENDPOINT_TTLS.get(endpoint_name(path)) if method == "GET" else None
+        cache_key = (self.api_user, path, tuple(sorted(params.items())) if params else ())
+        cached = self.cache.get(cache_key) if ttl else None
+        if cached is not None and cached.is_fresh and not fresh:
+            logger.debug(f"Cache hit: {method} {url} (user={self.api_user})")
+            self.telemetry.record_cache_hit(self._labels(method, path))
+            return self._decode(cached.body, accept)
+
+        if idempotent is None:
+            idempotent = method == "GET"
+        attempt = 1
+        while True:
+            final = not (idempotent or retry_guard) or attempt >= self.retry_policy.max_attempts
+            quiet = _expected_errors.get()
+            if method == "DELETE" and attempt > 1:
+                quiet |= {404}
+            try:
+                async with enforce_deadline(f"{method} {url}"):
+                    return await self._request_once(
+                        method, path, params, json, expected_status, accept, ttl, cache_key, final, quiet
+                    )
+            except Exception as e:
+                if method == "DELETE" and attempt > 1 and getattr(e, "status", None) == 404:
+                    logger.info(f"{method} {url} already applied by an earlier attempt")
+                    return None
+                if (
+                    not (idempotent or retry_guard)
+                    or not is_transient(e, self.retry_policy)
+                    or attempt >= self.retry_policy.max_attempts
+                ):
+                    raise
+                delay = self.backoff.next_delay(attempt)
+                left = remaining()
+                if left is not None and left <= delay:
+                    # No retry after all: this attempt's failure is the call's outcome.
+                    if not (isinstance(e, WireGuardAPIError) and e.status < 500):
+                        self._record_failure()
+                    raise DeadlineExceededError(f"Deadline exceeded before retrying {method} {url}") from e
+                logger.warning(
+                    f"Retrying {method} {url} in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{self.retry_policy.max_attempts}): {e}"
+                )
+                await asyncio.sleep(delay)
+                if retry_guard is not None:
+                    result = await retry_guard()
+                    if result is not RESEND:
+                        logger.info(f"{method} {url} already applied by an earlier attempt")
+                        return result
+                attempt += 1
+            finally:
+                if method != "GET":
+                    self.cache.invalidate(resource_name(path))
+
+    async def _request_once(self, method, path, params, json, expected_status, accept, ttl, cache_key, final=True, quiet=frozenset()):
+        url = self.base_url + path
+        self._check_available()
+        cached = self.cache.get(cache_key) if ttl else None
+        # Taken before sending: a write that invalidates the resource meanwhile bumps it.
+        generation = self.cache.generation(resource_name(path))
+        headers = {"accept": accept, "authorization": self._auth_header}
+        if json is not None:
+            headers["content-type"] = "application/json"
+        if cached is not None and cached.etag:
+            headers["if-none-match"] = cached.etag
+        try:
+            if method == "GET":
+                # Keyed by generation: a read issued after a write must not join a
+                # flight that started before it.
+                flight_key = (self.base_url, method, generation) + cache_key
+                if _flights.in_flight(flight_key):
+                    logger.debug(f"Joining in-flight {method} {url} (user={self.api_user})")
+                status, resp_headers, body = await _flights.do(
+                    flight_key, lambda: self._send(method, url, params, json, headers, final)
+                )
+            else:
+                status, resp_headers, body = await self._send(method, url, params, json, headers, final)
+            if status == 304 and cached is not None:
+                cached.expires_at = time.monotonic() + ttl
+                logger.info(f"Not modified: {method} {url}")
+                return self._decode(cached.body, accept)
+            if status != expected_status:
+                text = body.decode("utf-8", errors="replace")
+                log = logger.debug if status in quiet else logger.error
+                log(f"API error {status} for {url}: {text}")
+                raise WireGuardAPIError(f"API error {status}: {text}", status=status)
+            logger.info(f"Success: {method} {url}")
+            self.backoff.reset()
+            if ttl:
+                stored = self.cache.put(cache_key, CachedResponse(
+                    body=body,
+                    etag=resp_headers.get("ETag"),
+                    expires_at=time.monotonic() + ttl,
+                    resource=resource_name(path),
+                ), generation)
+                if not stored:
+                    logger.debug(f"Not caching {method} {url}: invalidated while in flight")
+            return self._decode(body, accept) if status != 204 else None
+        except WireGuardAPIError:
+            raise
+        except Exception as e:
+            logger.error(f"Exception during {method} {url}: {e}")
+            raise
+
+    async def stream(self, path: str, fields=None):
+        """
+        GET a JSON array endpoint and yield its records one at a time as the body
+        arrives, instead of buffering and decoding the whole response.
+        fields: optional iterable of keys to keep from each record.
+        Streams bypass the response cache and are not retried. The response status
+        decides the breaker outcome; a failure while reading the body doesn't count again.
+        """
+        url = self.base_url + path
+        self._check_available()
+        headers = {"accept": "application/json", "authorization": self._auth_header}
+        logger.info(f"GET {url} (user={self.api_user}) streaming")
+        labels = self._labels("GET", path)
+        started = time.monotonic()
+        size = 0
+        answered = False
+
+        async def counted(chunks):
+            nonlocal size
+            async for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+
+        try:
+            async with self.limiter.slot():
+                started = time.monotonic()
+                check_deadline(f"GET {url}")
+                async with _get_session().get(
+                    url,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(
+                        total=remaining(), sock_connect=REQUEST_TIMEOUT, sock_read=REQUEST_TIMEOUT
+                    ),
+                ) as resp:
+                    answered = True
+                    if resp.status >= 500:
+                        self._record_failure()
+                    else:
+                        self.breaker.record_success()
+                    try:
+                        if resp.status != 200:
+                            text = await resp.text(errors="replace")
+                            logger.error(f"API error {resp.status} for {url}: {text}")
+                            raise WireGuardAPIError(f"API error {resp.status}: {text}", status=resp.status)
+                        count = 0
+                        chunks = counted(resp.content.iter_chunked(STREAM_CHUNK_SIZE))
+                        async for record in iter_json_array(chunks, fields):
+                            count += 1
+                            yield record
+                        logger.info(f"Success: GET {url} ({count} records streamed)")
+                    finally:
+                        self.telemetry.record_response(labels, resp.status, time.monotonic() - started, size)
+        except asyncio.TimeoutError as e:
+            left = remaining()
+            if left is not None and left <= 0:
+                # Our own budget ran out; that says nothing about the portal's health.
+                self.breaker.release_trial()
+                raise DeadlineExceededError(f"Deadline exceeded during streamed GET {url}") from e
+            if not answered:
+                self._record_failure()
+            self.telemetry.record_timeout(labels, time.monotonic() - started)
+            logger.error(f"Timeout during streamed GET {url}: {e}")
+            raise
+        except aiohttp.ClientError as e:
+            if not answered:
+                self._record_failure()
+            self.telemetry.record_error(labels, time.monotonic() - started)
+            logger.error(f"Exception during streamed GET {url}: {e}")
+            raise
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+
+    def _check_available(self) -> None:
+        if not self.breaker.allow_request():
+            raise ServerUnavailableError(
+                f"Server {self.base_url} is unavailable (retry in {self.breaker.retry_after():.0f}s)"
+            )
+
+    async def _send(self, method: str, url: str, params: dict, json: dict, headers: dict, final: bool = True):
+        logger.info(f"{method} {url} (user={self.api_user})" + (f" params={params}" if params else ""))
+        labels = self._labels(method, url[len(self.base_url):])
+        started = time.monotonic()
+        try:
+            async with self.limiter.slot():
+                started = time.monotonic()
+                async with _get_session().request(
+                    method,
+                    url,
+                    params=params,
+                    json=json,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                ) as resp:
+                    body = await resp.read()
+        except asyncio.TimeoutError:
+            self._record_failure(final)
+            self.telemetry.record_timeout(labels, time.monotonic() - started)
+            raise
+        except aiohttp.ClientError:
+            self._record_failure(final)
+            self.telemetry.record_error(labels, time.monotonic() - started)
+            raise
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+        self.telemetry.record_response(labels, resp.status, time.monotonic() - started, len(body))
+        if resp.status >= 500:
+            self._record_failure(final or resp.status not in self.retry_policy.retry_statuses)
+        else:
+            self.breaker.record_success()
+        return resp.status, resp.headers, body
+
+    def _labels(self, method: str, path: str) -> tuple:
+        return self.base_url, method, endpoint_name(path.split("?", 1)[0]), current_priority()
+
+    def _record_failure(self, final: bool = True) -> None:
+        # An attempt that is going to be retried doesn't count yet, unless it was the
+        # half-open trial: its outcome decides the circuit either way.
+        if not final and self.breaker.state == CLOSED:
+            return
+        self.breaker.record_failure()
+        if self.breaker.state == OPEN:
+            self.breaker.start_probe(self.probe)
+
+    def record_health(self, ok: bool) -> None:
+        """
+        Feed the outcome of a health check made with probe() into the circuit
+        breaker, so a scheduled check can open or close the circuit like a request.
+        """
+        if ok:
+            self.breaker.record_success()
+        else:
+            self._record_failure()
+
+    async def probe(self, require_auth: bool = False) -> None:
+        """
+        Cheap liveness check that bypasses cache, circuit breaker and rate limit.
+        Any non-5xx answer means the portal is up; with require_auth, 401/403 fail
+        too (the portal is up but these credentials can't use it).
+        """
+        url = self.base_url + f"/user/by-id/{urllib.parse.quote(self.api_user, safe='')}"
+        async with _get_session().get(
+            url,
+            headers={"accept": "application/json", "authorization": self._auth_header},
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        ) as resp:
+            if resp.status >= 500 or (require_auth and resp.status in (401, 403)):
+                raise WireGuardAPIError(f"API error {resp.status}", resp.status)
+
+    @staticmethod
+    def _decode(body: bytes, accept: str):
+        if accept == "application/json":
+            return codec.loads(body)
+        if accept.startswith("text/"):
+            return body.decode("utf-8")
+        return body
+
+    @staticmethod
+    def _exists_guard(getter, identifier: str):
+        """
+        Retry guard for creates with a client-chosen identifier: resend only if the
+        record does not exist yet, otherwise return the record the earlier attempt created.
+        """
+        async def guard():
+            try:
+                with expected_errors(404):
+                    return await getter(identifier, fresh=True)
+            except WireGuardAPIError as e:
+                if e.status == 404:
+                    return RESEND
+                raise
+        return guard
+
+    # --- Interfaces ---
+
+    async def get_all_interfaces(self, fresh: bool = False) -> list:
+        return await self.request("GET", "/interface/all", fresh=fresh)
+
+    def iter_all_interfaces(self, fields=None):
+        return self.stream("/interface/all", fields)
+
+    async def get_interface_by_id(self, interface_id: str, fresh: bool = False) -> dict:
+        return await self.request("GET", f"/interface/by-id/{interface_id}", fresh=fresh)
+
+    async def update_interface_by_id(self, interface_id: str, interface_data: dict) -> dict:
+        try:
+            return await self.request("PUT", f"/interface/by-id/{interface_id}", json=interface_data, idempotent=True)
+        finally:
+            # Interface settings are rendered into every peer config.
+            await self.artifacts.invalidate(self.base_url)
+
+    async def delete_interface_by_id(self, interface_id: str) -> None:
+        try:
+            await self.request("DELETE", f"/interface/by-id/{interface_id}", expected_status=204, idempotent=True)
+        finally:
+            await self.artifacts.invalidate(self.base_url)
+
+    async def create_interface(self, interface_data: dict) -> dict:
+        interface_id = interface_data.get("Identifier")
+        return await self.request(
+            "POST", "/interface/new", json=interface_data,
+            retry_guard=self._exists_guard(self.get_interface_by_id, interface_id) if interface_id else None,
+        )
+
+    async def prepare_interface(self) -> dict:
+        return await self.request("GET", "/interface/prepare")
+
+    # --- Metrics ---
+
+    async def get_interface_metrics(self, interface_id: str) -> dict:
+        return await self.request("GET", f"/metrics/by-interface/{interface_id}")
+
+    async def get_user_metrics(self, user_id: str) -> dict:
+        return await self.request("GET", f"/metrics/by-user/{user_id}")
+
+    async def get_peer_metrics(self, peer_id: str) -> dict:
+        return await self.request("GET", f"/metrics/by-peer/{peer_id}")
+
+    # --- Users ---
+
+    async def get_all_users(self, fresh: bool = False) -> list:
+        return await self.request("GET", "/user/all", fresh=fresh)
+
+    def iter_all_users(self, fields=None):
+        return self.stream("/user/all", fields)
+
+    async def get_user_by_id(self, user_id: str, fresh: bool = False) -> dict:
+        return await self.request("GET", f"/user/by-id/{user_id}", fresh=fresh)
+
+    async def update_user_by_id(self, user_id: str, user_data: dict) -> dict:
+        return await self.request("PUT", f"/user/by-id/{user_id}", json=user_data, idempotent=True)
+
+    async def delete_user_by_id(self, user_id: str) -> None:
+        await self.request("DELETE", f"/user/by-id/{user_id}", expected_status=204, idempotent=True)
+
+    async def create_user(self, user_data: dict) -> dict:
+        user_id = user_data.get("Identifier")
+        return await self.request(
+            "POST", "/user/new", json=user_data,
+            retry_guard=self._exists_guard(self.get_user_by_id, user_id) if user_id else None,
+        )
+
+    # --- Peers ---
+
+    async def get_peer_by_id(self, peer_id: str) -> dict:
+        if not peer_id:
+            raise ValueError("peer_id cannot be empty")
+        encoded_peer_id = urllib.parse.quote(peer_id, safe='')
+        peer = await self.request("GET", f"/peer/by-id/{encoded_peer_id}")
+        if isinstance(peer, dict):
+            await self.artifacts.set_revision(self.base_url, peer_id, peer_revision(peer))
+        return peer
+
+    async def delete_peer_by_id(self, peer_id: str) -> None:
+        if not peer_id:
+            raise ValueError("peer_id cannot be empty")
+        encoded_peer_id = urllib.parse.quote(peer_id, safe='')
+        try:
+            await self.request("DELETE", f"/peer/by-id/{encoded_peer_id}", expected_status=204, idempotent=True)
+        finally:
+            await self.artifacts.invalidate(self.base_url, peer_id)
+
+    # --- Provisioning ---
+
+    async def get_peer_config(self, peer_id: str) -> str:
+        if not peer_id:
+            raise ValueError("peer_id cannot be empty")
+        async def fetch() -> bytes:
+            config = await self.request(
+                "GET", "/provisioning/data/peer-config", params={"PeerId": peer_id}, accept="text/plain"
+            )
+            return config.encode("utf-8")
+        return (await self._peer_artifact(peer_id, "conf", fetch)).decode("utf-8")
+
+    async def get_peer_qr(self, peer_id: str) -> bytes:
+        if not peer_id:
+            raise ValueError("peer_id cannot be empty")
+        async def fetch() -> bytes:
+            if QR_AVAILABLE:
+                # Render from the (usually cached) config instead of a second portal round trip.
+                config = await self.get_peer_config(peer_id)
+                try:
+                    return await render_qr(config)
+                except Exception as e:
+                    logger.warning(f"Local QR rendering failed for peer {peer_id}, using the portal: {e}")
+            return await self.request(
+                "GET", "/provisioning/data/peer-qr", params={"PeerId": peer_id}, accept="image/png"
+            )
+        return await self._peer_artifact(peer_id, "png", fetch)
+
+    async def _peer_artifact(self, peer_id: str, kind: str, fetch) -> bytes:
+        """
+        Serve a peer config/QR from the artifact cache, keyed by the peer's current
+        revision. The revision is learned from the peer record, which is fetched
+        only if it was not seen recently.
+        """
+        revision = self.artifacts.revision(self.base_url, peer_id)
+        if revision is None:
+            await self.get_peer_by_id(peer_id)
+            revision = self.artifacts.revision(self.base_url, peer_id)
+        key = (self.base_url, self.api_user, peer_id, revision, kind)
+        data = await self.artifacts.get(key)
+        if data is not None:
+            logger.debug(f"Peer {kind} served from cache (peer={peer_id}, revision={revision})")
+            return data
+        data = await fetch()
+        if revision is not None:
+            await self.artifacts.put(key, data)
+        return data
+
+    async def get_user_peer_info(self, user_id: str, fresh: bool = False) -> dict:
+        if not user_id:
+            raise ValueError("user_id cannot be empty")
+        return await self.request(
+            "GET", "/provisioning/data/user-info", params={"UserId": user_id}, fresh=fresh
+        )
+
+    async def create_peer(self, interface_id: str, user_id: str) -> dict:
+        if not interface_id:
+            raise ValueError("interface_id cannot be empty")
+        if not user_id:
+            raise ValueError("user_id cannot be empty")
+        data = {
+            "InterfaceIdentifier": interface_id,
+            "UserIdentifier": user_id
+        }
+        return await self.request("POST", "/provisioning/new-peer", json=data)
+
+
+def get_client(api_url: str, api_user: str, api_pass: str) -> WireGuardClient:
+    """
+    Get the shared client for a (server, credentials) pair, creating it on first use.
+    """
+    key = (api_url.rstrip("/"), api_user, api_pass)
+    client = _clients.get(key)
+    if client is None:
+        client = WireGuardClient(api_url, api_user, api_pass)
+        _clients[key] = client
+    return client
+
+
+def configure_server_rate_limits(servers) -> None:
+    """
+    Apply the request budgets of Server rows to their portals, for every client
+    of those servers, including ones created with get_client(api_url, ...).
+    """
+    for server in servers:
+        configure_rate_limit(server.api_url, getattr(server, "rate_limit_rps", None), getattr(server, "max_in_flight", None))
+
+
+def get_client_for(server, api_data) -> WireGuardClient:
+    """
+    Get the shared client for a Server row and its ServerAPIData credentials.
+    Also applies the server's configured request budget.
+    """
+    configure_rate_limit(server.api_url, getattr(server, "rate_limit_rps", None), getattr(server, "max_in_flight", None))
+    return get_client(server.api_url, api_data.api_login, api_data.api_password)
+
+
+async def close_clients() -> None:
+    """
+    Drop all cached clients and responses and close the pooled HTTP session.
+    """
+    global _session
+    _clients.clear()
+    clear_caches()
+    clear_breakers()
+    clear_backoffs()
+    clear_limiters()
+    get_artifact_cache().clear()
+    shutdown_qr_pool()
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from app.wireguard_api.exceptions import DeadlineExceededError
+
+# Time budget for a whole interactive screen (all API calls it makes).
+INTERACTIVE_DEADLINE = 5
+
+_deadline = contextvars.ContextVar("api_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Bound every API call made inside this block (and tasks spawned from it) by a
+    shared time budget. Nested deadlines can only shorten the outer one.
+    """
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(outer, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """
+    Seconds left in the current deadline, or None if no deadline is set.
+    """
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
+
+
+def check_deadline(what: str = "request") -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError(f"Deadline exceeded before {what}")
+
+
+@asynccontextmanager
+async def enforce_deadline(what: str = "request"):
+    """
+    Cancel the enclosed block when the current deadline runs out and raise
+    DeadlineExceededError instead of TimeoutError.
+    """
+    left = remaining()
+    if left is None:
+        yield
+        return
+    if left <= 0:
+        raise DeadlineExceededError(f"Deadline exceeded before {what}")
+    scope = asyncio.timeout(left)
+    try:
+        async with scope:
+            yield
+    except TimeoutError:
+        if scope.expired():
+            raise DeadlineExceededError(f"Deadline exceeded during {what}") from None
+        raise
@@ -1,2 +1,19 @@
 class WireGuardAPIError(Exception):
-    pass
\ No newline at end of file
+    def __init__(self, message: str = "", status: int = None):
+        super().__init__(message)
+        self.status = status
+
+
+class ServerUnavailableError(WireGuardAPIError):
+    """
+    Raised without contacting the portal while the server's circuit breaker is open.
+    """
+    pass
+
+
+class DeadlineExceededError(WireGuardAPIError):
+    """
+    Raised when the caller's deadline (see app.wireguard_api.deadline) runs out
+    before the portal answered.
+    """
+    pass
@@ -1,64 +1,35 @@
 import aiohttp
-import logging
-from app.wireguard_api.exceptions import WireGuardAPIError
+from app.wireguard_api.client import get_client
 
-logger = logging.getLogger("api.interfaces")
+# `session` is kept for backward compatibility; requests go through the pooled client session.
 
 async def get_all_interfaces(
     session: aiohttp.ClientSession,
-    api_url: str, api_user: str, api_pass: str
+    api_url: str, api_user: str, api_pass: str, fresh: bool = False
 ) -> list:
     """
     Get a list of all WireGuard interfaces.
     """
-    url = api_url.rstrip("/") + "/interface/all"
-    logger.info(f"GET {url} (user={api_user})")
-    try:
-        async with session.get(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Success: {url} [{len(data)} interfaces]")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during GET {url}: {e}")  # Только строка ошибки, без traceback
-        raise
+    return await get_client(api_url, api_user, api_pass).get_all_interfaces(fresh=fresh)
+
+def iter_all_interfaces(
+    session: aiohttp.ClientSession,
+    api_url: str, api_user: str, api_pass: str, fields=None
+):
+    """
+    Stream all WireGuard interfaces one record at a time (async iterator).
+    fields: optional iterable of keys to keep from each record.
+    """
+    return get_client(api_url, api_user, api_pass).iter_all_interfaces(fields)
 
 async def get_interface_by_id(
     session: aiohttp.ClientSession,
-    api_url: str, api_user: str, api_pass: str, interface_id: str
+    api_url: str, api_user: str, api_pass: str, interface_id: str, fresh: bool = False
 ) -> dict:
     """
     Get information about a specific WireGuard interface by its identifier.
     """
-    url = api_url.rstrip("/") + f"/interface/by-id/{interface_id}"
-    logger.info(f"GET {url} (user={api_user})")
-    try:
-        async with session.get(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Success: {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during GET {url}: {e}")
-        raise
+    return await get_client(api_url, api_user, api_pass).get_interface_by_id(interface_id, fresh=fresh)
 
 async def update_interface_by_id(
     session: aiohttp.ClientSession,
@@ -67,31 +38,7 @@ async def update_interface_by_id(
     """
     Update a WireGuard interface by its identifier.
     """
-    url = api_url.rstrip("/") + f"/interface/by-id/{interface_id}"
-    logger.info(f"PUT {url} (user={api_user})")
-    try:
-        async with session.put(
-            url,
-            json=interface_data,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={
-                "accept": "application/json",
-                "content-type": "application/json"
-            },
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Updated interface {interface_id} at {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during PUT {url}: {e}")
-        raise
-
+    return await get_client(api_url, api_user, api_pass).update_interface_by_id(interface_id, interface_data)
 
 async def delete_interface_by_id(
     session: aiohttp.ClientSession,
@@ -100,25 +47,7 @@ async def delete_interface_by_id(
     """
     Delete a WireGuard interface by its identifier.
     """
-    url = api_url.rstrip("/") + f"/interface/by-id/{interface_id}"
-    logger.info(f"DELETE {url} (user={api_user})")
-    try:
-        async with session.delete(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 204:
-                logger.info(f"Deleted interface {interface_id} at {url}")
-                return
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during DELETE {url}: {e}")
-        raise
+    await get_client(api_url, api_user, api_pass).delete_interface_by_id(interface_id)
 
 async def create_interface(
     session: aiohttp.ClientSession,
@@ -127,31 +56,8 @@ async def create_interface(
     """
     Create a new WireGuard interface.
     """
-    url = api_url.rstrip("/") + "/interface/new"
-    logger.info(f"POST {url} (user={api_user})")
-    try:
-        async with session.post(
-            url,
-            json=interface_data,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={
-                "accept": "application/json",
-                "content-type": "application/json"
-            },
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Created interface at {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during POST {url}: {e}")
-        raise
-        
+    return await get_client(api_url, api_user, api_pass).create_interface(interface_data)
+
 async def prepare_interface(
     session: aiohttp.ClientSession,
     api_url: str, api_user: str, api_pass: str
@@ -159,23 +65,4 @@ async def prepare_interface(
     """
     Prepare a new WireGuard interface record.
     """
-    url = api_url.rstrip("/") + "/interface/prepare"
-    logger.info(f"GET {url} (user={api_user})")
-    try:
-        async with session.get(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Prepared interface at {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during GET {url}: {e}")
-        raise
\ No newline at end of file
+    return await get_client(api_url, api_user, api_pass).prepare_interface()
@@ -1,8 +1,7 @@
 import aiohttp
-import logging
-from app.wireguard_api.exceptions import WireGuardAPIError
+from app.wireguard_api.client import get_client
 
-logger = logging.getLogger("api.metrics")
+# `session` is kept for backward compatibility; requests go through the pooled client session.
 
 async def get_interface_metrics(
     session: aiohttp.ClientSession,
@@ -11,26 +10,7 @@ async def get_interface_metrics(
     """
     Get metrics for a specific WireGuard interface.
     """
-    url = api_url.rstrip("/") + f"/metrics/by-interface/{interface_id}"
-    logger.info(f"GET {url} (user={api_user})")
-    try:
-        async with session.get(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Success: {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during GET {url}: {e}")
-        raise
+    return await get_client(api_url, api_user, api_pass).get_interface_metrics(interface_id)
 
 async def get_user_metrics(
     session: aiohttp.ClientSession,
@@ -39,26 +19,7 @@ async def get_user_metrics(
     """
     Get metrics for a specific user.
     """
-    url = api_url.rstrip("/") + f"/metrics/by-user/{user_id}"
-    logger.info(f"GET {url} (user={api_user})")
-    try:
-        async with session.get(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Success: {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during GET {url}: {e}")
-        raise
+    return await get_client(api_url, api_user, api_pass).get_user_metrics(user_id)
 
 async def get_peer_metrics(
     session: aiohttp.ClientSession,
@@ -67,23 +28,4 @@ async def get_peer_metrics(
     """
     Get metrics for a specific peer.
     """
-    url = api_url.rstrip("/") + f"/metrics/by-peer/{peer_id}"
-    logger.info(f"GET {url} (user={api_user})")
-    try:
-        async with session.get(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Success: {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during GET {url}: {e}")
-        raise
\ No newline at end of file
+    return await get_client(api_url, api_user, api_pass).get_peer_metrics(peer_id)
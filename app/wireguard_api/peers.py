@@ -1,9 +1,7 @@
 import aiohttp
-import logging
-import urllib.parse
-from app.wireguard_api.exceptions import WireGuardAPIError
+from app.wireguard_api.client import get_client
 
-logger = logging.getLogger("api.peers")
+# `session` is kept for backward compatibility; requests go through the pooled client session.
 
 async def get_peer_by_id(
     session: aiohttp.ClientSession,
@@ -12,29 +10,7 @@ async def get_peer_by_id(
     """
     Get a specific peer record by its identifier (public key).
     """
-    if not peer_id:
-        raise ValueError("peer_id cannot be empty")
-    encoded_peer_id = urllib.parse.quote(peer_id, safe='')
-    url = api_url.rstrip("/") + f"/peer/by-id/{encoded_peer_id}"
-    logger.info(f"GET {url} (user={api_user})")
-    try:
-        async with session.get(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Success: {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during GET {url}: {e}")
-        raise
+    return await get_client(api_url, api_user, api_pass).get_peer_by_id(peer_id)
 
 async def delete_peer_by_id(
     session: aiohttp.ClientSession,
@@ -43,25 +19,4 @@ async def delete_peer_by_id(
     """
     Delete a specific peer record by its identifier (public key).
     """
-    if not peer_id:
-        raise ValueError("peer_id cannot be empty")
-    encoded_peer_id = urllib.parse.quote(peer_id, safe='')
-    url = api_url.rstrip("/") + f"/peer/by-id/{encoded_peer_id}"
-    logger.info(f"DELETE {url} (user={api_user})")
-    try:
-        async with session.delete(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 204:
-                logger.info(f"Peer deleted successfully: {url}")
-                return
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during DELETE {url}: {e}")
-        raise
\ No newline at end of file
+    await get_client(api_url, api_user, api_pass).delete_peer_by_id(peer_id)
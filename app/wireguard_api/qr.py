@@ -0,0 +1,64 @@
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import qrcode
+    from qrcode.image.pure import PyPNGImage
+except ImportError:
+    qrcode = None
+
+QR_WORKERS = 2
+QR_BOX_SIZE = 8
+QR_BORDER = 4
+# Workers are not forked from the bot process: forking a process that runs threads
+# (event loop, resolver) can deadlock the child.
+QR_START_METHOD = "forkserver"
+
+# True when peer QR codes can be rendered locally (needs the optional `qrcode` package with pypng).
+QR_AVAILABLE = qrcode is not None
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def render_qr_png(text: str) -> bytes:
+    """
+    Encode text as a QR code PNG. CPU-bound; runs in a worker process.
+    """
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=QR_BOX_SIZE,
+        border=QR_BORDER,
+        image_factory=PyPNGImage,
+    )
+    qr.add_data(text)
+    qr.make(fit=True)
+    buf = io.BytesIO()
+    qr.make_image().save(buf)
+    return buf.getvalue()
+
+
+async def render_qr(text: str) -> bytes:
+    """
+    Render a QR code PNG in the worker pool without blocking the event loop.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=QR_WORKERS, mp_context=multiprocessing.get_context(QR_START_METHOD)
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool, render_qr_png, text)
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool on the next call.
+        shutdown_qr_pool()
+        raise
+
+
+def shutdown_qr_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,157 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+DEFAULT_RATE = 20.0
+DEFAULT_MAX_IN_FLIGHT = 8
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_priority = contextvars.ContextVar("api_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    """
+    Mark API calls made inside this block (and tasks spawned from it) as background
+    traffic, so interactive requests to the same portal are served first.
+    """
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class RateLimiter:
+    """
+    Token bucket (requests/second, burst of one second) plus a cap on requests in
+    flight, for one portal. Waiting interactive requests are always dispatched before
+    waiting background requests.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.tokens = float(max(1.0, rate))
+        self.in_flight = 0
+        self._updated = time.monotonic()
+        self._waiters = {INTERACTIVE: deque(), BACKGROUND: deque()}
+        self._timer = None
+
+    def configure(self, rate: float, max_in_flight: int) -> None:
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.tokens = min(self.tokens, float(max(1.0, rate)))
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire(_priority.get())
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: str = INTERACTIVE) -> None:
+        if not self._has_waiters(priority) and self._try_take():
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            elif future in self._waiters[priority]:
+                self._waiters[priority].remove(future)
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _has_waiters(self, priority: str) -> bool:
+        if priority == BACKGROUND:
+            return bool(self._waiters[INTERACTIVE] or self._waiters[BACKGROUND])
+        return bool(self._waiters[INTERACTIVE])
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(float(max(1.0, self.rate)), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            return False
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.in_flight += 1
+        return True
+
+    def _dispatch(self) -> None:
+        for priority in (INTERACTIVE, BACKGROUND):
+            queue = self._waiters[priority]
+            while queue:
+                if queue[0].done():
+                    queue.popleft()
+                    continue
+                if not self._try_take():
+                    if self.in_flight < self.max_in_flight:
+                        self._schedule((1 - self.tokens) / self.rate)
+                    return
+                queue.popleft().set_result(None)
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is None or self._timer.cancelled():
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+
+_limiters: dict = {}
+
+# base_url -> (rate, max_in_flight) configured for a server. Configuration, not
+# state: kept by clear_limiters so limiters created later still get it.
+_budgets: dict = {}
+
+
+def get_limiter(base_url: str) -> RateLimiter:
+    """
+    Get the rate limiter shared by all clients of a server, created with the
+    server's configured budget.
+    """
+    limiter = _limiters.get(base_url)
+    if limiter is None:
+        limiter = RateLimiter(*_budgets.get(base_url, (DEFAULT_RATE, DEFAULT_MAX_IN_FLIGHT)))
+        _limiters[base_url] = limiter
+    return limiter
+
+
+def configure_rate_limit(api_url: str, rate: float = None, max_in_flight: int = None) -> None:
+    """
+    Apply a server's request budget; None falls back to the defaults.
+    """
+    base_url = api_url.rstrip("/")
+    budget = (rate or DEFAULT_RATE, max_in_flight or DEFAULT_MAX_IN_FLIGHT)
+    _budgets[base_url] = budget
+    limiter = _limiters.get(base_url)
+    if limiter is not None and (limiter.rate, limiter.max_in_flight) != budget:
+        limiter.configure(*budget)
+
+
+def clear_limiters() -> None:
+    _limiters.clear()
@@ -0,0 +1,71 @@
+import aiohttp
+import asyncio
+import random
+from dataclasses import dataclass
+
+from app.wireguard_api.exceptions import WireGuardAPIError, ServerUnavailableError
+
+# Returned by a retry guard when the failed write was not applied and may be sent again.
+RESEND = object()
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    retry_statuses: frozenset = frozenset({429, 502, 503, 504})
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def is_transient(error: Exception, policy: RetryPolicy = DEFAULT_RETRY_POLICY) -> bool:
+    """
+    True for failures that may succeed when repeated: connection errors,
+    timeouts and gateway/overload statuses. An open circuit is never retried.
+    """
+    if isinstance(error, ServerUnavailableError):
+        return False
+    if isinstance(error, WireGuardAPIError):
+        return error.status in policy.retry_statuses
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+class ServerBackoff:
+    """
+    Exponential backoff with full jitter, shared by all requests to one server.
+    Consecutive transient failures on the server raise the backoff level for every
+    caller; any successful response resets it.
+    """
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.level = 0
+
+    def next_delay(self, attempt: int) -> float:
+        self.level += 1
+        exponent = min(max(attempt, self.level), 16)
+        cap = min(self.policy.max_delay, self.policy.base_delay * 2 ** (exponent - 1))
+        return random.uniform(0, cap)
+
+    def reset(self) -> None:
+        self.level = 0
+
+
+_backoffs: dict = {}
+
+
+def get_backoff(base_url: str, policy: RetryPolicy = DEFAULT_RETRY_POLICY) -> ServerBackoff:
+    """
+    Get the backoff state shared by all clients of a server.
+    """
+    backoff = _backoffs.get(base_url)
+    if backoff is None:
+        backoff = ServerBackoff(policy)
+        _backoffs[base_url] = backoff
+    return backoff
+
+
+def clear_backoffs() -> None:
+    _backoffs.clear()
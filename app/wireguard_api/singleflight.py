@@ -0,0 +1,29 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one in-flight call.
+    Every caller awaiting a key receives the result (or exception) of the shared call.
+    """
+
+    def __init__(self):
+        self._calls: dict = {}
+
+    def in_flight(self, key) -> bool:
+        return key in self._calls
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # Shielded so a cancelled caller does not cancel the call other callers are waiting on.
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
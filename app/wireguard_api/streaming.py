@@ -0,0 +1,69 @@
+import codecs
+import json
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",]"
+_decoder = json.JSONDecoder()
+
+
+def project(record, fields):
+    """
+    Keep only `fields` of a dict record; anything else is returned unchanged.
+    """
+    if fields is None or not isinstance(record, dict):
+        return record
+    return {key: record[key] for key in fields if key in record}
+
+
+async def iter_json_array(chunks, fields=None):
+    """
+    Incrementally decode a top-level JSON array from an async iterable of byte chunks,
+    yielding one element at a time. Only the unparsed tail of the stream is buffered.
+    fields: optional iterable of keys to keep from each dict element.
+    """
+    if fields is not None:
+        fields = tuple(fields)
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    started = False
+    expect_value = True
+    async for chunk in chunks:
+        buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                break
+            char = buf[pos]
+            if not started:
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+            elif char == "]":
+                return
+            elif char == "," and not expect_value:
+                expect_value = True
+                pos += 1
+            elif expect_value:
+                try:
+                    item, end = _decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # Incomplete element: wait for the next chunk.
+                    break
+                if not isinstance(item, (dict, list, str)) and (end == len(buf) or buf[end] not in _DELIMITERS):
+                    # A number may continue in the next chunk ("1" + ".5").
+                    break
+                pos = end
+                expect_value = False
+                yield project(item, fields)
+            else:
+                raise ValueError(f"Unexpected {char!r} in JSON array")
+    buf = buf[pos:] + utf8.decode(b"", final=True)
+    if buf.strip():
+        raise ValueError("Malformed JSON array")
+    raise ValueError("Truncated JSON array")
@@ -0,0 +1,127 @@
+import bisect
+from collections import Counter
+from dataclasses import dataclass, field
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded.
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Approximate quantile: upper bound of the bucket holding the q-th observation
+        (the observed maximum for the unbounded bucket).
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+@dataclass
+class EndpointStats:
+    latency: Histogram = field(default_factory=Histogram)
+    statuses: Counter = field(default_factory=Counter)
+    timeouts: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    bytes_received: int = 0
+
+    @property
+    def requests(self) -> int:
+        return sum(self.statuses.values()) + self.timeouts + self.errors
+
+
+class TelemetryRegistry:
+    """
+    In-process counters for portal traffic, labelled by
+    (server, method, logical endpoint, priority). Priority tells interactive
+    (UI) traffic apart from background jobs such as user sync.
+    """
+
+    def __init__(self):
+        self._stats: dict = {}
+
+    def _get(self, labels: tuple) -> EndpointStats:
+        stats = self._stats.get(labels)
+        if stats is None:
+            stats = EndpointStats()
+            self._stats[labels] = stats
+        return stats
+
+    def record_response(self, labels: tuple, status: int, seconds: float, size: int) -> None:
+        stats = self._get(labels)
+        stats.latency.observe(seconds)
+        stats.statuses[status] += 1
+        stats.bytes_received += size
+
+    def record_timeout(self, labels: tuple, seconds: float) -> None:
+        stats = self._get(labels)
+        stats.latency.observe(seconds)
+        stats.timeouts += 1
+
+    def record_error(self, labels: tuple, seconds: float) -> None:
+        stats = self._get(labels)
+        stats.latency.observe(seconds)
+        stats.errors += 1
+
+    def record_cache_hit(self, labels: tuple) -> None:
+        self._get(labels).cache_hits += 1
+
+    def snapshot(self, server: str = None) -> list[dict]:
+        """
+        Plain-dict view of all series (optionally of one server), slowest p95 first.
+        """
+        rows = []
+        for (base_url, method, endpoint, priority), stats in self._stats.items():
+            if server is not None and base_url != server.rstrip("/"):
+                continue
+            rows.append({
+                "server": base_url,
+                "method": method,
+                "endpoint": endpoint,
+                "priority": priority,
+                "requests": stats.requests,
+                "cache_hits": stats.cache_hits,
+                "statuses": dict(stats.statuses),
+                "timeouts": stats.timeouts,
+                "errors": stats.errors,
+                "bytes_received": stats.bytes_received,
+                "latency_avg": stats.latency.sum / stats.latency.count if stats.latency.count else 0.0,
+                "latency_p50": stats.latency.quantile(0.5),
+                "latency_p95": stats.latency.quantile(0.95),
+                "latency_max": stats.latency.max,
+                "latency_buckets": dict(zip(
+                    [str(b) for b in stats.latency.buckets] + ["+Inf"], stats.latency.counts
+                )),
+            })
+        rows.sort(key=lambda row: row["latency_p95"], reverse=True)
+        return rows
+
+    def clear(self) -> None:
+        self._stats.clear()
+
+
+_registry = TelemetryRegistry()
+
+
+def get_telemetry() -> TelemetryRegistry:
+    return _registry
@@ -1,64 +1,35 @@
 import aiohttp
-import logging
-from app.wireguard_api.exceptions import WireGuardAPIError
+from app.wireguard_api.client import get_client
 
-logger = logging.getLogger("api.users")
+# `session` is kept for backward compatibility; requests go through the pooled client session.
 
 async def get_all_users(
     session: aiohttp.ClientSession,
-    api_url: str, api_user: str, api_pass: str
+    api_url: str, api_user: str, api_pass: str, fresh: bool = False
 ) -> list:
     """
     Get a list of all users.
     """
-    url = api_url.rstrip("/") + "/user/all"
-    logger.info(f"GET {url} (user={api_user})")
-    try:
-        async with session.get(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Success: {url} [{len(data)} users]")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during GET {url}: {e}")
-        raise
+    return await get_client(api_url, api_user, api_pass).get_all_users(fresh=fresh)
+
+def iter_all_users(
+    session: aiohttp.ClientSession,
+    api_url: str, api_user: str, api_pass: str, fields=None
+):
+    """
+    Stream all users one record at a time (async iterator).
+    fields: optional iterable of keys to keep from each record.
+    """
+    return get_client(api_url, api_user, api_pass).iter_all_users(fields)
 
 async def get_user_by_id(
     session: aiohttp.ClientSession,
-    api_url: str, api_user: str, api_pass: str, user_id: str
+    api_url: str, api_user: str, api_pass: str, user_id: str, fresh: bool = False
 ) -> dict:
     """
     Get user information by user identifier.
     """
-    url = api_url.rstrip("/") + f"/user/by-id/{user_id}"
-    logger.info(f"GET {url} (user={api_user})")
-    try:
-        async with session.get(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Success: {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during GET {url}: {e}")
-        raise
+    return await get_client(api_url, api_user, api_pass).get_user_by_id(user_id, fresh=fresh)
 
 async def update_user_by_id(
     session: aiohttp.ClientSession,
@@ -67,30 +38,7 @@ async def update_user_by_id(
     """
     Update user information by user identifier.
     """
-    url = api_url.rstrip("/") + f"/user/by-id/{user_id}"
-    logger.info(f"PUT {url} (user={api_user})")
-    try:
-        async with session.put(
-            url,
-            json=user_data,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={
-                "accept": "application/json",
-                "content-type": "application/json"
-            },
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Updated user at {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during PUT {url}: {e}")
-        raise
+    return await get_client(api_url, api_user, api_pass).update_user_by_id(user_id, user_data)
 
 async def delete_user_by_id(
     session: aiohttp.ClientSession,
@@ -99,25 +47,7 @@ async def delete_user_by_id(
     """
     Delete a user by user identifier.
     """
-    url = api_url.rstrip("/") + f"/user/by-id/{user_id}"
-    logger.info(f"DELETE {url} (user={api_user})")
-    try:
-        async with session.delete(
-            url,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={"accept": "application/json"},
-        ) as resp:
-            if resp.status == 204:
-                logger.info(f"Deleted user {user_id} at {url}")
-                return
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during DELETE {url}: {e}")
-        raise
+    await get_client(api_url, api_user, api_pass).delete_user_by_id(user_id)
 
 async def create_user(
     session: aiohttp.ClientSession,
@@ -126,27 +56,4 @@ async def create_user(
     """
     Create a new user.
     """
-    url = api_url.rstrip("/") + "/user/new"
-    logger.info(f"POST {url} (user={api_user})")
-    try:
-        async with session.post(
-            url,
-            json=user_data,
-            auth=aiohttp.BasicAuth(api_user, api_pass),
-            timeout=10,
-            headers={
-                "accept": "application/json",
-                "content-type": "application/json"
-            },
-        ) as resp:
-            if resp.status == 200:
-                data = await resp.json()
-                logger.info(f"Created user at {url}")
-                return data
-            else:
-                text = await resp.text()
-                logger.error(f"API error {resp.status} for {url}: {text}")
-                raise WireGuardAPIError(f"API error {resp.status}: {text}")
-    except Exception as e:
-        logger.error(f"Exception during POST {url}: {e}")
-        raise
\ No newline at end of file
+    return await get_client(api_url, api_user, api_pass).create_user(user_data)